@@ -0,0 +1,144 @@
+"""Logging setup: a queue-fed background writer with rotating, compressed log files"""
+import atexit
+import contextvars
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import uuid
+from typing import Optional, Tuple
+
+from paths import log_directory
+
+LOG_FILE_NAME = "bedrock_unlocker.log"
+MAX_LOG_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 5
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Marker lines the history index looks for
+SESSION_STARTED = "Session {session} started"
+OPERATION_STARTED = "Operation {operation} started"
+OPERATION_FINISHED = "Operation {operation} finished: {outcome} - {message}"
+OUTCOME_SUCCESS = "success"
+OUTCOME_FAILED = "failed"
+OUTCOME_CANCELLED = "cancelled"
+
+SESSION_ID = uuid.uuid4().hex[:12]
+_operation = contextvars.ContextVar("operation", default=None)
+_step = contextvars.ContextVar("step", default=None)
+_listener = None
+
+
+def set_log_operation(operation: Optional[str]) -> Tuple[contextvars.Token, contextvars.Token]:
+    """Tag log records from the current thread with an operation name.
+
+    Returns tokens for reset_log_operation, so a pool thread does not keep the tag for later work.
+    """
+    return _operation.set(operation), _step.set(None)
+
+
+def reset_log_operation(tokens: Tuple[contextvars.Token, contextvars.Token]):
+    """Put back the operation and step that were current before set_log_operation"""
+    operation_token, step_token = tokens
+    _step.reset(step_token)
+    _operation.reset(operation_token)
+
+
+def set_log_step(step: Optional[str]):
+    """Tag log records from the current thread with the current step"""
+    _step.set(step)
+
+
+class ContextFilter(logging.Filter):
+    """Attach session, operation and step to every record in the logging thread"""
+
+    def filter(self, record):
+        record.session = SESSION_ID
+        record.operation = _operation.get()
+        record.step = _step.get()
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "session": getattr(record, "session", SESSION_ID),
+            "operation": getattr(record, "operation", None),
+            "step": getattr(record, "step", None),
+            "message": record.getMessage(),
+        }
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def setup_logging(json_lines: bool = False, level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """Route all logging through a queue to a background writer thread.
+
+    Callers only pay for putting a record on the queue; formatting, disk writes and
+    gzip compression of rotated segments happen on the listener thread. Disk use is
+    bounded to LOG_BACKUP_COUNT compressed segments of MAX_LOG_BYTES each.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_dir = log_directory()
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_dir / LOG_FILE_NAME,
+        maxBytes=MAX_LOG_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8"
+    )
+    file_handler.namer = _gzip_namer
+    file_handler.rotator = _gzip_rotator
+    file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(TEXT_FORMAT))
+
+    handlers = [file_handler]
+    # Windowed builds have no console to write to
+    if sys.stderr is not None:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        handlers.append(stream_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    logging.getLogger(__name__).info(SESSION_STARTED.format(session=SESSION_ID))
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
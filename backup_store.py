@@ -0,0 +1,154 @@
+"""Generational, content-addressed store for backups of the original system files"""
+import json
+import os
+import shutil
+import struct
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from integrity import hash_file, write_json_atomic
+from paths import data_directory
+
+INDEX_NAME = "index.json"
+DEFAULT_KEEP_GENERATIONS = 5
+
+# VS_FIXEDFILEINFO.dwSignature, little endian
+_FIXED_FILE_INFO_SIGNATURE = struct.pack("<I", 0xFEEF04BD)
+_VERSION_INFO_KEY = "VS_VERSION_INFO".encode("utf-16-le")
+
+
+class BackupEntry(NamedTuple):
+    """One stored generation of a target file"""
+    sha256: str
+    size: int
+    version: Optional[str]
+    timestamp: float
+    source: str
+
+
+def read_file_version(path) -> Optional[str]:
+    """Return the file version of a PE file (e.g. "10.0.19041.1") or None if it has none"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    start = data.find(_VERSION_INFO_KEY)
+    if start < 0:
+        return None
+    pos = data.find(_FIXED_FILE_INFO_SIGNATURE, start)
+    if pos < 0 or pos + 16 > len(data):
+        return None
+    ms, ls = struct.unpack_from("<II", data, pos + 8)
+    return f"{ms >> 16}.{ms & 0xFFFF}.{ls >> 16}.{ls & 0xFFFF}"
+
+
+class BackupStore:
+    """Backups kept under one application directory instead of next to the system files.
+
+    File contents live once in objects/<sha256>; index.json lists, per target path,
+    the stored generations newest first. Restoring copies the object next to the
+    target and swaps it in with a single os.replace.
+    """
+
+    def __init__(self, root: Optional[Path] = None, keep_generations: int = DEFAULT_KEEP_GENERATIONS):
+        self.root = Path(root) if root else data_directory() / "backups"
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / INDEX_NAME
+        self.keep_generations = keep_generations
+        self.index = self.load_index()
+
+    @staticmethod
+    def key(target_file) -> str:
+        return os.path.normcase(os.path.abspath(target_file))
+
+    def load_index(self) -> Dict[str, List[Dict]]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_index(self):
+        write_json_atomic(self.index_path, self.index, indent=2, fsync=True)
+
+    def object_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256
+
+    def generations(self, target_file) -> List[BackupEntry]:
+        """Stored generations of target_file, newest first"""
+        return [BackupEntry(**entry) for entry in self.index.get(self.key(target_file), [])]
+
+    def latest(self, target_file) -> Optional[BackupEntry]:
+        generations = self.generations(target_file)
+        return generations[0] if generations else None
+
+    def add(self, target_file, source: str = "unlock", content_path=None) -> BackupEntry:
+        """Store the current contents of target_file as its newest generation.
+
+        content_path stores another file as a generation of target_file instead,
+        e.g. a backup an earlier version left next to it. Identical content is
+        stored once; re-adding the newest generation only refreshes it.
+        """
+        content_path = content_path or target_file
+        digest = hash_file(content_path)
+        object_path = self.object_path(digest)
+        if not object_path.exists():
+            self.objects_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = object_path.with_name(digest + ".tmp")
+            shutil.copyfile(content_path, temp_path)
+            if hash_file(temp_path) != digest:
+                os.remove(temp_path)
+                raise IOError(f"Backup copy of {content_path} does not match the original")
+            os.replace(temp_path, object_path)
+
+        entry = BackupEntry(
+            sha256=digest,
+            size=os.path.getsize(content_path),
+            version=read_file_version(content_path),
+            timestamp=time.time(),
+            source=source
+        )
+        history = [e for e in self.index.get(self.key(target_file), []) if e["sha256"] != digest]
+        self.index[self.key(target_file)] = [entry._asdict()] + history
+        self.prune()
+        self.save_index()
+        return entry
+
+    def prune(self):
+        """Drop generations beyond the retention policy and delete unreferenced objects"""
+        for key, history in self.index.items():
+            self.index[key] = history[:self.keep_generations]
+
+        referenced = {e["sha256"] for history in self.index.values() for e in history}
+        if self.objects_dir.is_dir():
+            for object_path in self.objects_dir.iterdir():
+                if object_path.name not in referenced:
+                    try:
+                        object_path.unlink()
+                    except OSError:
+                        pass
+
+    def verify(self, entry: BackupEntry) -> bool:
+        """True if the stored object for entry is present and intact"""
+        object_path = self.object_path(entry.sha256)
+        try:
+            return object_path.stat().st_size == entry.size and hash_file(object_path) == entry.sha256
+        except OSError:
+            return False
+
+    def restore(self, target_file, entry: BackupEntry):
+        """Put entry back in place of target_file with one atomic rename"""
+        if not self.verify(entry):
+            raise IOError(f"Stored backup {entry.sha256} is missing or corrupted")
+
+        temp_path = f"{target_file}.restore"
+        try:
+            shutil.copy2(self.object_path(entry.sha256), temp_path)
+            if hash_file(temp_path) != entry.sha256:
+                raise IOError(f"Staged copy of {target_file} does not match its backup")
+            os.replace(temp_path, target_file)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
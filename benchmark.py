@@ -0,0 +1,536 @@
+"""Performance benchmarks run against a temporary SystemRoot with fake Windows tools.
+
+    python benchmark.py                     run and compare with benchmark_baseline.json
+    python benchmark.py --save-baseline     run and store the results as the new baseline
+    python benchmark.py --only backup       run only the benchmarks whose name contains "backup"
+
+takeown, icacls, sfc and DISM are replaced by deterministic fakes (this script
+with the "fake" command), some of them with fixed delays, so the numbers are
+comparable between runs and the suite runs on Linux. The process exits with 1
+when a benchmark is slower than the max_seconds recorded for it in the baseline.
+GUI benchmarks are skipped when PyQt5 is not installed.
+
+The same benchmarks run under pytest-benchmark as tests/test_benchmarks.py.
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+BASELINE_NAME = "benchmark_baseline.json"
+DEFAULT_ROUNDS = 5
+DEFAULT_TOLERANCE = 0.25
+# Sub-millisecond benchmarks jitter by more than any percentage
+MIN_SLACK_SECONDS = 0.002
+SFC_SESSION_LINES = 10000
+DUMMY_FILE_MB = 64
+TOOL_DELAY = 0.02
+SFC_CHUNK_DELAY = 0.001
+DISM_BAR_WIDTH = 58
+# Marker next to the recorded sessions: sfc has no good copy to restore from until DISM ran
+STORE_DAMAGED = "component_store_damaged"
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_PY = os.path.join(SOURCE_DIR, "main.py")
+
+
+class BenchmarkResult(NamedTuple):
+    """Median time of one benchmark over its rounds; skipped holds the reason it did not run"""
+    name: str
+    seconds: Optional[float]
+    rounds: int
+    details: Dict
+    skipped: Optional[str] = None
+
+
+def write_sfc_session(path: Path, lines: int = SFC_SESSION_LINES):
+    """A recorded sfc /scannow session: UTF-16, progress redrawn with carriage returns, ending repaired"""
+    parts = ["\r\nBeginning system scan.  This process will take some time.\r\n\r\n",
+             "Beginning verification phase of system scan.\r\n"]
+    for i in range(lines):
+        if i % 2:
+            parts.append(f"\rVerification {i * 100 // lines}% complete.")
+        else:
+            parts.append(f"\r\n[SR] Verifying 100 components, batch {i // 2}\r\n")
+    parts.append("\rVerification 100% complete.\r\n\r\n")
+    parts.append("Windows Resource Protection found corrupt files and successfully repaired them.\r\n")
+    path.write_bytes("".join(parts).encode("utf-16-le"))
+
+
+def write_dism_session(path: Path, restored: bool = True):
+    """A recorded DISM /RestoreHealth session: single-byte text, progress bar redrawn with carriage returns"""
+    parts = ["\r\nDeployment Image Servicing and Management tool\r\nVersion: 10.0.19041.3636\r\n\r\n",
+             "Image Version: 10.0.19045.4046\r\n\r\n"]
+    last = 1000 if restored else 620
+    for tenths in range(0, last + 1, 25):
+        percent = f"{tenths / 10:.1f}%"
+        bar = ("=" * (tenths * DISM_BAR_WIDTH // 1000)).ljust(DISM_BAR_WIDTH)
+        middle = (DISM_BAR_WIDTH - len(percent)) // 2
+        parts.append(f"\r[{bar[:middle]}{percent}{bar[middle + len(percent):]}]")
+    if restored:
+        parts.append("\r\nThe restore operation completed successfully.\r\nThe operation completed successfully.\r\n")
+    else:
+        parts.append("\r\n\r\nError: 0x800f081f\r\n\r\nThe source files could not be found.\r\n"
+                     "Use the \"Source\" option to specify the location of the files that are required to restore "
+                     "the feature.\r\n")
+    path.write_bytes("".join(parts).encode("ascii"))
+
+
+def run_fake(tool: str, delay: float, session: str, args: List[str]) -> int:
+    """Stand-in for a Windows tool: waits for delay, then behaves like the real one.
+
+    sfc and DISM replay their recorded session. While the component store is
+    marked damaged, sfc /scanfile cannot restore a missing file; a DISM session
+    that ends restored repairs the store.
+    """
+    if tool in ("sfc", "dism"):
+        # Replay the recorded session chunk by chunk, delay being the pause between chunks
+        with open(session, "rb") as f:
+            data = f.read()
+        for start in range(0, len(data), 4096):
+            sys.stdout.buffer.write(data[start:start + 4096])
+            sys.stdout.buffer.flush()
+            time.sleep(delay)
+
+        store_damaged = Path(session).with_name(STORE_DAMAGED)
+        if tool == "dism":
+            if b"restore operation completed successfully" not in data:
+                return 1
+            with contextlib.suppress(FileNotFoundError):
+                store_damaged.unlink()
+            return 0
+        for arg in args:
+            if arg.lower().startswith("/scanfile="):
+                target = arg.split("=", 1)[1]
+                if not os.path.exists(target) and not store_damaged.exists():
+                    Path(target).write_bytes(b"MZ original")
+        return 0
+    time.sleep(delay)
+    print(f"SUCCESS: {tool} {' '.join(args)}")
+    return 0
+
+
+class VirtualSystem:
+    """A temporary SystemRoot, data directory and log directory for the duration of a run.
+
+    The environment variables the application reads are pointed into the
+    temporary tree and put back on exit. The system profile caches SystemRoot
+    for the whole process, so it is probed again on entry and forgotten on exit.
+    """
+    ENVIRONMENT = ("SystemRoot", "BEDROCK_UNLOCKER_DATA_DIR", "BEDROCK_UNLOCKER_LOG_DIR")
+
+    def __init__(self):
+        self.temp_dir = None
+        self.saved_environment = {}
+
+    def __enter__(self):
+        self.temp_dir = tempfile.TemporaryDirectory(prefix="bedrock-bench-")
+        self.root = Path(self.temp_dir.name)
+        self.system_root = self.root / "Windows"
+        self.data_dir = self.root / "data"
+        self.log_dir = self.root / "logs"
+        self.session = self.root / "sfc_session.bin"
+        self.dism_session = self.root / "dism_session.bin"
+        write_sfc_session(self.session)
+        write_dism_session(self.dism_session)
+
+        for name in self.ENVIRONMENT:
+            self.saved_environment[name] = os.environ.get(name)
+        os.environ["SystemRoot"] = str(self.system_root)
+        os.environ["BEDROCK_UNLOCKER_DATA_DIR"] = str(self.data_dir)
+        os.environ["BEDROCK_UNLOCKER_LOG_DIR"] = str(self.log_dir)
+
+        from system_profile import reset_profile, system_profile
+        reset_profile()
+        if Path(system_profile().system_root) != self.system_root:
+            # Never let the fakes loose on the real Windows folder
+            self.__exit__(None, None, None)
+            raise RuntimeError("System profile does not point into the temporary SystemRoot")
+        self.reset()
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, value in self.saved_environment.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        from system_profile import reset_profile
+        reset_profile()
+        self.temp_dir.cleanup()
+
+    def reset(self):
+        """Put fresh original DLLs in place and forget all backups and caches"""
+        import core
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+        self.data_dir.mkdir(parents=True)
+        self.repair_component_store()
+        for folder in ("System32", "SysWOW64"):
+            (self.system_root / folder).mkdir(parents=True, exist_ok=True)
+            (self.system_root / folder / core.DLL_NAME).write_bytes(b"MZ original " + folder.encode())
+
+    def damage_component_store(self):
+        """Make sfc unable to restore files until DISM has run"""
+        (self.root / STORE_DAMAGED).touch()
+
+    def repair_component_store(self):
+        with contextlib.suppress(FileNotFoundError):
+            (self.root / STORE_DAMAGED).unlink()
+
+    def processes(self, tool_delay: float = 0.0, sfc_delay: float = 0.0, dism_session: Optional[Path] = None):
+        """A ProcessRunner that starts the fakes instead of the real tools.
+
+        dism_session replaces the recorded DISM session; it must lie in the temporary tree.
+        """
+        from processes import ProcessRunner
+
+        def fake(tool, delay, session):
+            return [sys.executable, os.path.abspath(__file__), "fake", tool, str(delay), str(session)]
+
+        return ProcessRunner({
+            "takeown": fake("takeown", tool_delay, self.session),
+            "icacls": fake("icacls", tool_delay, self.session),
+            "sfc": fake("sfc", sfc_delay, self.session),
+            "dism": fake("dism", sfc_delay, dism_session or self.dism_session),
+        })
+
+    def payload_manifest(self) -> Path:
+        """A manifest of the bundled DLLs, which a source checkout only has once main.spec was built.
+
+        Written into the temporary tree so an interrupted run cannot leave a
+        manifest in the checkout for later runs to trust.
+        """
+        from integrity import MANIFEST_NAME, write_manifest
+        path = self.root / MANIFEST_NAME
+        if not path.exists():
+            write_manifest(path, SOURCE_DIR, [("dll", "dll")])
+        return path
+
+    def dummy_file(self, name: str, megabytes: int = DUMMY_FILE_MB) -> Path:
+        path = self.root / name
+        if not path.exists():
+            block = os.urandom(1024 * 1024)
+            with open(path, "wb") as f:
+                for _ in range(megabytes):
+                    f.write(block)
+        return path
+
+
+def measure(function: Callable[[], Optional[Dict]], rounds: int,
+            setup: Optional[Callable[[], None]] = None) -> Tuple[float, Dict]:
+    """Median wall time of function over rounds, with setup run untimed before each round"""
+    samples = []
+    details = {}
+    for _ in range(rounds):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        details = function() or {}
+        samples.append(time.perf_counter() - started)
+    details["min_seconds"] = round(min(samples), 6)
+    details["max_seconds"] = round(max(samples), 6)
+    return statistics.median(samples), details
+
+
+# The bench_* functions time through measure, or through pytest-benchmark in tests/test_benchmarks.py
+Measure = Callable[..., Tuple[float, Dict]]
+
+
+def bench_log_replay(system: VirtualSystem, rounds: int, measure: Measure = measure) -> BenchmarkResult:
+    """Parse the recorded sfc session and log every event, as the worker does during a scan"""
+    import core
+    from sfc_output import ProgressThrottle, SfcOutputParser
+
+    data = system.session.read_bytes()
+    messages = []
+    runner = core.OperationRunner("restore", messages.append)
+
+    def replay():
+        messages.clear()
+        parser = SfcOutputParser()
+        throttle = ProgressThrottle()
+        for start in range(0, len(data), 4096):
+            runner.handle_sfc_events(parser.feed(data[start:start + 4096]), throttle)
+        runner.handle_sfc_events(parser.close(), throttle)
+        return {"lines": SFC_SESSION_LINES, "messages_logged": len(messages)}
+
+    seconds, details = measure(replay, rounds)
+    details["lines_per_second"] = round(SFC_SESSION_LINES / seconds)
+    return BenchmarkResult("log_replay", seconds, rounds, details)
+
+
+def bench_log_view(system: VirtualSystem, rounds: int, measure: Measure = measure) -> BenchmarkResult:
+    """The same session through BedrockUnlocker.append_log, including the render of the log view"""
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        from gui import BedrockUnlocker
+    except ImportError as e:
+        return BenchmarkResult("log_view", None, 0, {}, skipped=str(e))
+
+    from sfc_output import MESSAGE, SfcOutputParser
+    parser = SfcOutputParser()
+    events = parser.feed(system.session.read_bytes()) + parser.close()
+    lines = [event.text for event in events if event.kind == MESSAGE]
+
+    app = QApplication.instance() or QApplication([])
+    window = BedrockUnlocker()
+
+    def replay():
+        for line in lines:
+            window.append_log(line)
+        window.log_display.flush()
+        app.processEvents()
+        return {"lines": len(lines)}
+
+    seconds, details = measure(replay, rounds)
+    details["lines_per_second"] = round(len(lines) / seconds)
+    window.deleteLater()
+    return BenchmarkResult("log_view", seconds, rounds, details)
+
+
+def _files_check(system: VirtualSystem, name: str, rounds: int, measure: Measure, cold: bool) -> BenchmarkResult:
+    """The work behind check_required_files, with the hash cache cleared before each round if cold"""
+    import core
+    from integrity import CACHE_NAME
+
+    manifest_path = system.payload_manifest()
+
+    def clear_cache():
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(system.data_dir / CACHE_NAME)
+
+    def check():
+        problems, verified = core.verify_payload(manifest_path)
+        return {"problems": len(problems), "manifest": verified}
+
+    if not cold:
+        check()
+    seconds, details = measure(check, rounds, setup=clear_cache if cold else None)
+    return BenchmarkResult(name, seconds, rounds, details)
+
+
+def bench_files_check_cold(system: VirtualSystem, rounds: int, measure: Measure = measure) -> BenchmarkResult:
+    return _files_check(system, "files_check_cold", rounds, measure, cold=True)
+
+
+def bench_files_check_warm(system: VirtualSystem, rounds: int, measure: Measure = measure) -> BenchmarkResult:
+    return _files_check(system, "files_check_warm", rounds, measure, cold=False)
+
+
+def _throughput(name: str, path: Path, rounds: int, measure: Measure, function: Callable[[], Optional[Dict]],
+                setup: Optional[Callable[[], None]] = None) -> BenchmarkResult:
+    size_mb = path.stat().st_size / (1024 * 1024)
+    seconds, details = measure(function, rounds, setup=setup)
+    details["megabytes"] = size_mb
+    details["megabytes_per_second"] = round(size_mb / seconds, 1)
+    return BenchmarkResult(name, seconds, rounds, details)
+
+
+def bench_hash_file(system: VirtualSystem, rounds: int, measure: Measure = measure) -> BenchmarkResult:
+    """Hashing a large dummy file"""
+    from integrity import hash_file
+
+    source = system.dummy_file("large.dll")
+    return _throughput("hash_file", source, rounds, measure, lambda: {"sha256": hash_file(source)})
+
+
+def bench_backup_add(system: VirtualSystem, rounds: int, measure: Measure = measure) -> BenchmarkResult:
+    """Backing up a large dummy file into an empty store"""
+    from backup_store import BackupStore
+
+    source = system.dummy_file("large.dll")
+    target = system.root / "target.dll"
+    store_root = system.root / "store"
+
+    def fresh_store():
+        shutil.rmtree(store_root, ignore_errors=True)
+        shutil.copyfile(source, target)
+
+    return _throughput("backup_add", source, rounds, measure,
+                       lambda: {"version": BackupStore(store_root).add(target).version}, setup=fresh_store)
+
+
+def bench_backup_restore(system: VirtualSystem, rounds: int, measure: Measure = measure) -> BenchmarkResult:
+    """Restoring a large dummy file from the store"""
+    from backup_store import BackupStore
+
+    source = system.dummy_file("large.dll")
+    target = system.root / "target.dll"
+    shutil.copyfile(source, target)
+    store = BackupStore(system.root / "store")
+    entry = store.add(target)
+    return _throughput("backup_restore", source, rounds, measure, lambda: store.restore(target, entry))
+
+
+def _run_operation(operation: str, processes) -> Dict:
+    import core
+
+    runner = core.OperationRunner(operation, processes=processes)
+    success, message = runner.run()
+    if not success:
+        raise RuntimeError(f"{operation} failed: {message}")
+    return {"message": message}
+
+
+def bench_unlock_restore_cycle(system: VirtualSystem, rounds: int, measure: Measure = measure) -> BenchmarkResult:
+    """Unlock and restore with fakes that take a fixed time, so the numbers show the app's overhead"""
+    delayed_tools = system.processes(tool_delay=TOOL_DELAY)
+    seconds, details = measure(
+        lambda: {**_run_operation("unlock", delayed_tools), **_run_operation("restore", delayed_tools)},
+        rounds, setup=system.reset
+    )
+    details["tool_delay"] = TOOL_DELAY
+    return BenchmarkResult("unlock_restore_cycle", seconds, rounds, details)
+
+
+def bench_restore_via_sfc(system: VirtualSystem, rounds: int, measure: Measure = measure) -> BenchmarkResult:
+    """A restore with no backups, so sfc replays its recorded session for every file"""
+    import core
+
+    def delete_targets():
+        system.reset()
+        for target in core.get_target_files():
+            os.remove(target)
+
+    seconds, details = measure(lambda: _run_operation("restore", system.processes(sfc_delay=SFC_CHUNK_DELAY)),
+                               rounds, setup=delete_targets)
+    details["sfc_chunk_delay"] = SFC_CHUNK_DELAY
+    return BenchmarkResult("restore_via_sfc", seconds, rounds, details)
+
+
+def bench_startup_headless(system: VirtualSystem, rounds: int, measure: Measure = measure) -> BenchmarkResult:
+    """Launch to result for a headless command"""
+    output = system.root / "status.json"
+
+    def status():
+        subprocess.run([sys.executable, MAIN_PY, "--output", str(output), "status"], check=True)
+        return {"command": "status"}
+
+    seconds, details = measure(status, rounds)
+    return BenchmarkResult("startup_headless", seconds, rounds, details)
+
+
+def bench_startup_gui(system: VirtualSystem, rounds: int, measure: Measure = measure) -> BenchmarkResult:
+    """Launch to first paint of the GUI, which exits right after painting"""
+    try:
+        import PyQt5.QtWidgets  # noqa: F401
+    except ImportError as e:
+        return BenchmarkResult("startup_gui", None, 0, {}, skipped=str(e))
+
+    from startup_timing import launch_once
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    first_paint = []
+
+    def launch():
+        first_paint.append(launch_once([sys.executable, MAIN_PY], str(system.root / "startup.json")))
+        return {"first_paint_ms": round(statistics.median(first_paint), 1)}
+
+    seconds, details = measure(launch, rounds)
+    return BenchmarkResult("startup_gui", seconds, rounds, details)
+
+
+BENCHMARKS = [
+    bench_log_replay, bench_log_view, bench_files_check_cold, bench_files_check_warm, bench_hash_file,
+    bench_backup_add, bench_backup_restore, bench_unlock_restore_cycle, bench_restore_via_sfc,
+    bench_startup_headless, bench_startup_gui,
+]
+
+
+def run_benchmarks(rounds: int, only: Optional[str] = None) -> List[BenchmarkResult]:
+    from app_logging import setup_logging
+
+    results = []
+    with VirtualSystem() as system:
+        # Log to the temporary directory only, like the windowed build without a console
+        with contextlib.redirect_stderr(None):
+            setup_logging()
+        for benchmark in BENCHMARKS:
+            if only and only not in benchmark.__name__:
+                continue
+            results.append(benchmark(system, rounds))
+    return results
+
+
+def compare(results: List[BenchmarkResult], baseline: Dict) -> List[str]:
+    """Names of the benchmarks slower than the max_seconds recorded in the baseline"""
+    return [
+        result.name for result in results
+        if result.seconds is not None and result.name in baseline
+        and result.seconds > baseline[result.name]["max_seconds"]
+    ]
+
+
+def to_baseline(results: List[BenchmarkResult], tolerance: float) -> Dict:
+    return {
+        result.name: {
+            "seconds": round(result.seconds, 6),
+            "max_seconds": round(max(result.seconds * (1 + tolerance), result.seconds + MIN_SLACK_SECONDS), 6),
+            "details": result.details,
+        }
+        for result in results if result.seconds is not None
+    }
+
+
+def print_results(results: List[BenchmarkResult], baseline: Dict, regressions: List[str]):
+    print(f"{'Benchmark':<22} {'Median':>10} {'Baseline':>10} {'Limit':>10}  Status")
+    for result in results:
+        if result.seconds is None:
+            print(f"{result.name:<22} {'':>10} {'':>10} {'':>10}  skipped ({result.skipped})")
+            continue
+        recorded = baseline.get(result.name)
+        base = f"{recorded['seconds'] * 1000:.1f}ms" if recorded else "-"
+        limit = f"{recorded['max_seconds'] * 1000:.1f}ms" if recorded else "-"
+        status = "SLOWER" if result.name in regressions else ("ok" if recorded else "new")
+        print(f"{result.name:<22} {result.seconds * 1000:>8.1f}ms {base:>10} {limit:>10}  {status}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmarks and compare them with a baseline")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--baseline", default=os.path.join(SOURCE_DIR, BASELINE_NAME))
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store the results as the new baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="slowdown allowed before a benchmark fails, when saving a baseline")
+    parser.add_argument("--only", help="run only benchmarks whose function name contains this text")
+    parser.add_argument("--output", metavar="FILE", help="also write the results as JSON to FILE")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.rounds, args.only)
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = {}
+
+    if args.save_baseline:
+        baseline.update(to_baseline(results, args.tolerance))
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        regressions = []
+    else:
+        regressions = compare(results, baseline)
+
+    print_results(results, baseline, regressions)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(to_baseline(results, args.tolerance), f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "fake":
+        # fake <tool> <delay> <session> [tool arguments...]
+        sys.exit(run_fake(sys.argv[2], float(sys.argv[3]), sys.argv[4], sys.argv[5:]))
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Cooperative cancellation for worker operations and their child processes"""
+import os
+import signal
+import subprocess
+import threading
+
+
+class OperationCancelled(Exception):
+    """Raised at a checkpoint once cancellation has been requested"""
+
+
+class CancellationToken:
+    """Thread-safe flag set by the UI and checked by the worker between steps"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """Raise OperationCancelled if cancellation was requested"""
+        if self._event.is_set():
+            raise OperationCancelled("Operation cancelled")
+
+
+def process_group_kwargs() -> dict:
+    """Popen arguments that start a hidden child in its own process group"""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def stop_process(process: subprocess.Popen, grace: float = 5.0):
+    """Ask a child process group to stop and kill it if it is still running after grace seconds.
+
+    Returns immediately; the forced kill happens on a timer thread.
+    """
+    if process is None or process.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            os.killpg(process.pid, signal.SIGTERM)
+    except OSError:
+        pass
+
+    def kill_if_running():
+        if process.poll() is None:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    timer = threading.Timer(grace, kill_if_running)
+    timer.daemon = True
+    timer.start()
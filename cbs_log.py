@@ -0,0 +1,141 @@
+"""Memory-mapped analysis of CBS.log entries written by sfc for the target DLLs"""
+import mmap
+import ntpath
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+REPAIRED = "repaired"
+NOT_REPAIRED = "could_not_repair"
+NOT_TOUCHED = "not_touched"
+
+MAX_LINES_PER_TARGET = 20
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+TIMESTAMP_LENGTH = 19
+
+_REPAIRED_PATTERN = re.compile(rb"Repairing corrupted file|Repaired file|Repair complete", re.I)
+_NOT_REPAIRED_PATTERN = re.compile(rb"Cannot repair|could not reproject|Could not repair", re.I)
+_WOW64_PATTERN = re.compile(rb"\\SysWOW64\\|arch wow64|arch x86", re.I)
+
+
+class CbsFinding(NamedTuple):
+    """What the CBS log says happened to one target file"""
+    path: str
+    outcome: str
+    lines: List[str]
+
+
+def default_cbs_log_path(system_root: str) -> str:
+    return os.path.join(system_root, "Logs", "CBS", "CBS.log")
+
+
+def _line_timestamp(mapped, pos: int) -> Optional[datetime]:
+    try:
+        return datetime.strptime(mapped[pos:pos + TIMESTAMP_LENGTH].decode("ascii"), TIMESTAMP_FORMAT)
+    except (UnicodeDecodeError, ValueError):
+        return None
+
+
+def _next_line_start(mapped, pos: int) -> int:
+    if pos == 0:
+        return 0
+    newline = mapped.find(b"\n", pos - 1)
+    return len(mapped) if newline < 0 else newline + 1
+
+
+def find_session_offset(mapped, since: datetime) -> int:
+    """Offset of the first line logged at or after since.
+
+    CBS.log is chronological, so the file offsets themselves act as the index:
+    a binary search over them needs a few dozen timestamp probes even for a
+    log of several hundred megabytes. Lines without a timestamp are skipped.
+    """
+    low, high = 0, len(mapped)
+    while low < high:
+        middle = (low + high) // 2
+        pos = _next_line_start(mapped, middle)
+        timestamp = None
+        while pos < len(mapped) and timestamp is None:
+            timestamp = _line_timestamp(mapped, pos)
+            if timestamp is None:
+                pos = _next_line_start(mapped, pos + 1)
+        if timestamp is None or timestamp >= since:
+            high = middle
+        else:
+            low = middle + 1
+    # Untimestamped lines just before the session continue the previous entry
+    pos = _next_line_start(mapped, low)
+    while pos < len(mapped) and _line_timestamp(mapped, pos) is None:
+        pos = _next_line_start(mapped, pos + 1)
+    return pos
+
+
+def _target_for_line(line: bytes, targets: Dict[str, bool]) -> Optional[str]:
+    """Pick the target a log line refers to, using its path or architecture"""
+    lowered = line.lower()
+    for path in targets:
+        if path.lower().encode("utf-8", "replace") in lowered:
+            return path
+    if len(targets) == 1:
+        return next(iter(targets))
+    # x86 components live in SysWOW64 only on 64-bit systems, which are the ones with two targets
+    wow64 = bool(_WOW64_PATTERN.search(line))
+    for path, is_wow64 in targets.items():
+        if is_wow64 == wow64:
+            return path
+    return None
+
+
+def analyze_cbs_log(log_path: str, target_files: List[str], since: Optional[datetime] = None) -> List[CbsFinding]:
+    """Report, for each target, whether sfc repaired it, failed to, or never touched it.
+
+    Only the section logged since the given time is read, and within it only
+    the lines mentioning the DLL's file name, found with mmap.find. Memory use
+    does not depend on the size of the log.
+    """
+    targets = {path: "syswow64" in path.lower() for path in target_files}
+    outcomes = {path: NOT_TOUCHED for path in target_files}
+    lines = {path: [] for path in target_files}
+    # CBS writes file names both in their canonical case and in lower case
+    names = set()
+    for path in target_files:
+        name = ntpath.basename(path)
+        names.update({name.encode("utf-8"), name.lower().encode("utf-8")})
+
+    with open(log_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [CbsFinding(path, NOT_TOUCHED, []) for path in target_files]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = find_session_offset(mapped, since) if since else 0
+            for line in _matching_lines(mapped, sorted(names), start):
+                if not (_REPAIRED_PATTERN.search(line) or _NOT_REPAIRED_PATTERN.search(line)):
+                    continue
+                target = _target_for_line(line, targets)
+                if target is None:
+                    continue
+                outcomes[target] = NOT_REPAIRED if _NOT_REPAIRED_PATTERN.search(line) else REPAIRED
+                kept = lines[target]
+                kept.append(line.decode("utf-8", "replace").strip())
+                del kept[:-MAX_LINES_PER_TARGET]
+
+    return [CbsFinding(path, outcomes[path], lines[path]) for path in target_files]
+
+
+def _matching_lines(mapped, names: List[bytes], start: int) -> List[bytes]:
+    """Lines from start onward containing any of names, in file order"""
+    spans = {}
+    for name in names:
+        pos = start
+        while True:
+            hit = mapped.find(name, pos)
+            if hit < 0:
+                break
+            newline = mapped.rfind(b"\n", start, hit)
+            line_start = newline + 1 if newline >= 0 else start
+            line_end = mapped.find(b"\n", hit)
+            if line_end < 0:
+                line_end = len(mapped)
+            spans[line_start] = line_end
+            pos = line_end + 1
+    return [mapped[line_start:spans[line_start]] for line_start in sorted(spans)]
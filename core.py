@@ -0,0 +1,764 @@
+"""Qt-free implementation of the unlock and restore operations, shared by the GUI and CLI"""
+import os
+import shutil
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional, Tuple
+from app_logging import (OPERATION_FINISHED, OPERATION_STARTED, OUTCOME_CANCELLED, OUTCOME_FAILED, OUTCOME_SUCCESS,
+                         reset_log_operation, set_log_operation)
+from backup_store import BackupStore, read_file_version
+from cancellation import CancellationToken, OperationCancelled, stop_process
+from cbs_log import NOT_REPAIRED, NOT_TOUCHED, REPAIRED, analyze_cbs_log, default_cbs_log_path
+from integrity import MANIFEST_NAME, HashCache, hash_file, load_manifest, verify_files
+from journal import Journal, JournalStep
+from paths import resource_path
+from processes import ProcessRunner
+from repair_pipeline import RepairPipeline
+from sfc_output import (SfcOutputParser, DismOutputParser, ProgressThrottle, PHASE, PROGRESS,
+                        FAILED_VERDICTS, DISM_RESTORED)
+from system_profile import system_profile
+from tracing import Tracer
+
+# Backups written next to the system files by earlier versions
+BACKUP_SUFFIX = ".backup"
+DIGEST_SUFFIX = ".sha256"
+# Sizes a real Windows.ApplicationModel.Store.dll stays well within
+LEGACY_BACKUP_MIN_BYTES = 64 * 1024
+LEGACY_BACKUP_MAX_BYTES = 64 * 1024 * 1024
+
+DLL_NAME = "Windows.ApplicationModel.Store.dll"
+
+# States reported by scan_target_states
+STATE_MISSING = "missing"
+STATE_ORIGINAL = "original"
+STATE_UNLOCKED = "unlocked"
+STATE_UNKNOWN = "unknown"
+
+logger = logging.getLogger(__name__)
+
+
+def is_64bit_system() -> bool:
+    """Check if system is 64-bit"""
+    return system_profile().is_64bit
+
+
+def get_system_info() -> str:
+    """Get system architecture information"""
+    return system_profile().architecture
+
+
+def check_admin_privileges() -> bool:
+    """Check if running with administrator privileges"""
+    return system_profile().admin
+
+
+def get_target_files() -> List[str]:
+    """Get list of target DLL files based on system architecture"""
+    profile = system_profile()
+    files = [os.path.join(profile.system_root, "System32", DLL_NAME)]
+
+    if profile.is_64bit:
+        files.append(os.path.join(profile.system_root, "SysWOW64", DLL_NAME))
+
+    return files
+
+
+def required_payload_files() -> List[str]:
+    """Bundle-relative paths of the replacement DLLs needed on this system"""
+    if is_64bit_system():
+        return [
+            f"dll/64-bit/System32/{DLL_NAME}",
+            f"dll/64-bit/SysWOW64/{DLL_NAME}"
+        ]
+    return [f"dll/32-bit/System32/{DLL_NAME}"]
+
+
+def bundled_dll_path(system_folder: str) -> Path:
+    """Path of the bundled replacement DLL for a system folder"""
+    arch_folder = "64-bit" if is_64bit_system() else "32-bit"
+    return Path(resource_path(f"dll/{arch_folder}/{system_folder}/{DLL_NAME}"))
+
+
+def verify_payload(manifest_path: Optional[str] = None,
+                   token: Optional[CancellationToken] = None) -> Tuple[List[Tuple[str, str]], bool]:
+    """Check the required bundled DLLs against the payload manifest, by default the bundled one.
+
+    Returns the (path, problem) pairs found and whether a manifest was available.
+    Raises OperationCancelled if token is cancelled before every file was checked.
+    """
+    manifest = load_manifest(manifest_path or resource_path(MANIFEST_NAME))
+    cache = HashCache()
+    try:
+        problems = verify_files(resource_path(""), required_payload_files(), manifest, cache, token)
+    finally:
+        cache.save()
+    return problems, manifest is not None
+
+
+class TargetState(NamedTuple):
+    """What is currently installed at one target path"""
+    path: str
+    folder: str
+    state: str
+    version: Optional[str] = None
+
+
+def bundled_dll_digest(system_folder: str, manifest, cache: HashCache) -> Optional[Tuple[int, str]]:
+    """(size, sha256) of the bundled replacement, from the manifest when possible"""
+    arch_folder = "64-bit" if is_64bit_system() else "32-bit"
+    relative = f"dll/{arch_folder}/{system_folder}/{DLL_NAME}"
+    if manifest and relative in manifest:
+        return manifest[relative]["size"], manifest[relative]["sha256"]
+    path = resource_path(relative)
+    if not os.path.exists(path):
+        return None
+    return os.path.getsize(path), cache.sha256(path)
+
+
+def scan_target_states(store: Optional[BackupStore] = None, cache: Optional[HashCache] = None,
+                       token: Optional[CancellationToken] = None) -> List[TargetState]:
+    """Classify each target as the original, the bundled replacement, missing or unknown.
+
+    Sizes are compared first and a file is only hashed when its size matches a
+    candidate; digests come from the hash cache, so repeat scans of unchanged
+    files cost a stat each. token is checked before each target.
+    """
+    store = store or BackupStore()
+    own_cache = cache is None
+    cache = cache or HashCache()
+    manifest = load_manifest(resource_path(MANIFEST_NAME))
+
+    states = []
+    try:
+        for target_file in get_target_files():
+            if token:
+                token.check()
+            folder_name = "System32" if "System32" in target_file else "SysWOW64"
+            try:
+                size = os.path.getsize(target_file)
+            except OSError:
+                states.append(TargetState(target_file, folder_name, STATE_MISSING))
+                continue
+
+            bundled = bundled_dll_digest(folder_name, manifest, cache)
+            if bundled and bundled[0] == size and cache.sha256(target_file) == bundled[1]:
+                states.append(TargetState(target_file, folder_name, STATE_UNLOCKED))
+                continue
+
+            state = TargetState(target_file, folder_name, STATE_UNKNOWN)
+            for entry in store.generations(target_file):
+                if entry.size == size and cache.sha256(target_file) == entry.sha256:
+                    state = TargetState(target_file, folder_name, STATE_ORIGINAL, entry.version)
+                    break
+            states.append(state)
+    finally:
+        if own_cache:
+            cache.save()
+    return states
+
+
+def recover_interrupted_operation(log_callback: Optional[Callable[[str], None]] = None) -> Optional[Tuple[bool, str]]:
+    """Roll back an operation a crash or power loss left half-done. Returns None if there was none."""
+    interrupted = Journal().load()
+    if interrupted is None:
+        return None
+    if not check_admin_privileges():
+        message = f"An interrupted {interrupted.operation} needs administrator privileges to be rolled back"
+        logger.warning(message)
+        return False, message
+    return OperationRunner("recover", log_callback).run()
+
+
+class OperationRunner:
+    """Runs an unlock or restore operation, reporting through plain callbacks.
+
+    Used directly by the command line and wrapped by OperationJob in the GUI.
+    External tools are started through processes, and restore escalates
+    through the steps of pipeline; both can be replaced.
+    """
+
+    def __init__(self, operation: str, log_callback: Optional[Callable[[str], None]] = None,
+                 progress_callback: Optional[Callable[[int], None]] = None,
+                 processes: Optional[ProcessRunner] = None, pipeline: Optional[RepairPipeline] = None):
+        self.operation = operation
+        self.log_callback = log_callback
+        self.progress_callback = progress_callback
+        self.processes = processes or ProcessRunner()
+        self.pipeline = pipeline or RepairPipeline()
+        self.profile = system_profile()
+        self.backup_store = BackupStore()
+        self.journal = Journal()
+        self.tracer = Tracer(operation)
+        self.token = CancellationToken()
+        self.process = None
+        self.sfc_verdict = None
+        self.dism_verdict = None
+        self.deleted_targets = []
+        self.cbs_findings = []
+        self.summary = []
+
+    def run(self) -> Tuple[bool, str]:
+        """Run the operation to completion. Returns (success, message)."""
+        log_context = set_log_operation(self.operation)
+        try:
+            logger.info(OPERATION_STARTED.format(operation=self.operation))
+            success, message = self.run_operation()
+            if self.token.cancelled:
+                outcome = OUTCOME_CANCELLED
+            else:
+                outcome = OUTCOME_SUCCESS if success else OUTCOME_FAILED
+            logger.info(OPERATION_FINISHED.format(operation=self.operation, outcome=outcome, message=message))
+            return success, message
+        finally:
+            reset_log_operation(log_context)
+
+    def run_operation(self) -> Tuple[bool, str]:
+        try:
+            with self.tracer.span(self.operation):
+                if self.operation == "recover":
+                    return self.recover_operation()
+                elif self.operation == "unlock":
+                    self.journal.begin(self.operation)
+                    result = self.unlock_operation()
+                elif self.operation == "restore":
+                    self.journal.begin(self.operation)
+                    result = self.restore_operation()
+                else:
+                    return False, f"Unknown operation: {self.operation}"
+            self.journal.commit()
+            return result
+        except OperationCancelled:
+            # Cancellation only takes effect between steps, and unlock rolls itself back
+            if all(os.path.exists(target_file) for target_file in self.deleted_targets):
+                self.journal.commit()
+            else:
+                # Left in the journal, so the next start tries the rollback again
+                self.log("⚠️ Not every file could be rolled back; this is retried the next time the app starts")
+            self.log("Operation cancelled")
+            return False, "Operation cancelled"
+        except Exception as e:
+            # Left in the journal, so the next start rolls the files back
+            return False, str(e)
+        finally:
+            self.report_timings()
+
+    def report_timings(self):
+        """Export the run as a Chrome trace and keep the per-step summary"""
+        try:
+            trace_path = self.tracer.export()
+            logger.info(f"Trace written to {trace_path}")
+        except OSError as e:
+            logger.warning(f"Could not write trace: {str(e)}")
+        self.summary = self.tracer.format_summary()
+        for line in self.summary:
+            logger.info(line)
+
+    def cancel(self):
+        """Request cancellation; a running sfc or DISM process is stopped without waiting for it"""
+        self.token.cancel()
+        stop_process(self.process)
+
+    def log(self, message: str):
+        """Write a message to the log file and forward it to the log callback"""
+        logger.info(message)
+        if self.log_callback:
+            self.log_callback(message)
+
+    def progress(self, percent: int):
+        if self.progress_callback:
+            self.progress_callback(percent)
+
+    def unlock_operation(self) -> Tuple[bool, str]:
+        """Perform unlock operation in separate thread"""
+        self.log("Starting unlock operation...")
+        
+        # Get target files
+        files = get_target_files()
+        
+        try:
+            for target_file in files:
+                self.token.check()
+                folder_name = "System32" if "System32" in target_file else "SysWOW64"
+                self.log(f"Processing {folder_name}...")
+
+                with self.tracer.span("process", folder=folder_name):
+                    processed = self.process_dll_file(target_file, folder_name)
+                if processed:
+                    self.log(f"Successfully processed {folder_name}")
+                else:
+                    self.log(f"Failed to process {folder_name}")
+            self.token.check()
+        except OperationCancelled:
+            self.roll_back_unlock()
+            raise
+        
+        # Copy custom DLLs; once started this always runs to completion
+        copy_success = self.copy_custom_dlls()
+        if copy_success:
+            return True, "Unlock operation completed successfully"
+        return False, "Unlock operation failed: One or more custom DLLs were not copied"
+    
+    def roll_back_unlock(self) -> bool:
+        """Put back files already deleted by a cancelled unlock. Returns True if every one is back.
+
+        Runs after the token was cancelled, so nothing here checks it; every
+        deleted file is tried even if an earlier one fails.
+        """
+        rolled_back = True
+        for target_file in self.deleted_targets:
+            if os.path.exists(target_file):
+                continue
+            folder_name = "System32" if "System32" in target_file else "SysWOW64"
+            self.log(f"Rolling back {folder_name} file...")
+            try:
+                restored = self.restore_from_backup(target_file)
+            except Exception as e:
+                self.log(f"Error rolling back {folder_name} file: {str(e)}")
+                restored = False
+            if not restored:
+                self.log(f"❌ Could not roll back {folder_name} file, please run Restore")
+                rolled_back = False
+        return rolled_back
+
+    def recover_operation(self) -> Tuple[bool, str]:
+        """Put back the originals of every file an interrupted operation had started to change"""
+        interrupted = self.journal.load()
+        if interrupted is None:
+            return True, "Nothing to recover"
+        started = datetime.fromtimestamp(interrupted.started).strftime("%Y-%m-%d %H:%M:%S")
+        self.log(f"Recovering from an interrupted {interrupted.operation} started {started}...")
+
+        # The first record per target holds the original; later ones only say how far it got
+        steps = {}
+        for step in interrupted.steps:
+            steps.setdefault(step.target, step)
+        last_steps = {step.target: step for step in interrupted.steps}
+
+        recovered = True
+        for target_file, step in steps.items():
+            folder_name = "System32" if "System32" in target_file else "SysWOW64"
+            last_step = last_steps[target_file]
+            state = "finished" if last_step.done else "was interrupted"
+            self.log(f"Last step on {folder_name} file ({last_step.action}) {state}")
+
+            temp_path = target_file + ".restore"
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+                self.log(f"Removed partial copy {temp_path}")
+            with self.tracer.span("recover", folder=folder_name):
+                if not self.restore_recorded_original(step, folder_name):
+                    recovered = False
+
+        if not recovered:
+            return False, "Could not recover every file, please run Restore"
+        self.journal.commit()
+        return True, f"Rolled back the interrupted {interrupted.operation}"
+
+    def restore_recorded_original(self, step: JournalStep, folder_name: str) -> bool:
+        """Put back the original a journal step recorded for its target"""
+        target_file = step.target
+        if step.sha256 is None and step.action == "copy":
+            # Copied onto a target unlock found missing, so the original state is no file at all
+            return self.remove_copied_file(target_file, folder_name)
+        if step.sha256 is None:
+            self.log(f"No original was recorded for {folder_name} file")
+            return False
+        if os.path.exists(target_file) and hash_file(target_file) == step.sha256:
+            self.log(f"{folder_name} file is already the original -- left unchanged")
+            return True
+
+        entry = next((e for e in self.backup_store.generations(target_file) if e.sha256 == step.sha256), None)
+        if entry is None:
+            if step.backup:
+                return self.restore_from_legacy_backup(target_file, folder_name)
+            self.log(f"❌ Backup of the original {folder_name} file is missing")
+            return False
+        try:
+            if os.path.exists(target_file) and not self.grant_access(target_file, folder_name):
+                return False
+            self.backup_store.restore(target_file, entry)
+        except Exception as e:
+            self.log(f"Error restoring {folder_name} from backup: {str(e)}")
+            return False
+        self.log(f"Restored {folder_name} file from backup (version {entry.version or 'unknown'})")
+        return True
+
+    def remove_copied_file(self, target_file: str, folder_name: str) -> bool:
+        """Remove a custom DLL copied where no file existed before the unlock"""
+        if not os.path.exists(target_file):
+            self.log(f"{folder_name} file did not exist before the unlock and is still absent")
+            return True
+        try:
+            if not self.grant_access(target_file, folder_name):
+                return False
+            os.remove(target_file)
+        except Exception as e:
+            self.log(f"Error removing {folder_name} file: {str(e)}")
+            return False
+        self.log(f"Removed the {folder_name} file copied where none existed before the unlock")
+        return True
+
+    def original_digest(self, target_file: str, folder_name: str) -> Optional[str]:
+        """Digest of the newest stored original of target_file, recorded in the journal"""
+        bundled_path = bundled_dll_path(folder_name)
+        bundled_hash = hash_file(bundled_path) if bundled_path.exists() else None
+        entry = next((e for e in self.backup_store.generations(target_file) if e.sha256 != bundled_hash), None)
+        return entry.sha256 if entry else None
+
+    def restore_operation(self) -> Tuple[bool, str]:
+        """Restore original files, escalating from backups to sfc and DISM only when needed"""
+        if self.profile.reboot_pending:
+            self.log("⚠️ Windows is waiting for a restart: if sfc is needed it may be slow or fail until you restart")
+        pending = self.pipeline.run(self, get_target_files())
+        if self.pipeline.sfc_targets:
+            self.analyze_repairs(self.pipeline.sfc_targets)
+        if not pending:
+            outcome = self.pipeline.last_step.outcome if self.pipeline.last_step else "already in place"
+            return True, f"Original files {outcome}"
+        folders = ", ".join("System32" if "System32" in f else "SysWOW64" for f in pending)
+        return False, f"Could not restore the original files in {folders}"
+
+    def analyze_repairs(self, target_files: List[str]):
+        """Log what CBS.log recorded about the targets since this restore started"""
+        log_path = default_cbs_log_path(self.profile.system_root)
+        if not os.path.exists(log_path):
+            return
+        try:
+            with self.tracer.span("cbs_log", bytes=os.path.getsize(log_path)):
+                self.cbs_findings = analyze_cbs_log(
+                    log_path, target_files, datetime.fromtimestamp(self.tracer.started_at)
+                )
+        except Exception as e:
+            self.log(f"Could not read CBS log: {str(e)}")
+            return
+
+        descriptions = {
+            REPAIRED: "repaired",
+            NOT_REPAIRED: "could not be repaired",
+            NOT_TOUCHED: "not touched",
+        }
+        for finding in self.cbs_findings:
+            folder_name = "System32" if "System32" in finding.path else "SysWOW64"
+            self.log(f"CBS log: {folder_name} file {descriptions[finding.outcome]}")
+            for line in finding.lines:
+                logger.info(line)
+
+    def restore_from_backup(self, target_file: str) -> bool:
+        """Put back the newest verified backup of a single file. Returns True if the original is in place.
+
+        Does not check for cancellation, so a cancelled unlock can still roll back through it.
+        """
+        folder_name = "System32" if "System32" in target_file else "SysWOW64"
+        bundled_path = bundled_dll_path(folder_name)
+        bundled_hash = hash_file(bundled_path) if bundled_path.exists() else None
+
+        entry = next((e for e in self.backup_store.generations(target_file) if e.sha256 != bundled_hash), None)
+        if entry is None:
+            return self.restore_from_legacy_backup(target_file, folder_name)
+
+        try:
+            if os.path.exists(target_file):
+                digest = hash_file(target_file)
+                if digest == entry.sha256:
+                    self.log(f"{folder_name} file is already the original")
+                    return True
+                if not self.may_replace(target_file, folder_name, digest, bundled_hash):
+                    return False
+                if not self.grant_access(target_file, folder_name):
+                    return False
+
+            self.journal.record("restore", target_file, entry.sha256)
+            with self.tracer.span("copy", folder=folder_name, bytes=entry.size):
+                self.backup_store.restore(target_file, entry)
+            self.journal.complete(target_file)
+            self.log(f"Restored {folder_name} file from backup (version {entry.version or 'unknown'})")
+            return True
+
+        except Exception as e:
+            self.log(f"Error restoring {folder_name} from backup: {str(e)}")
+            return self.restore_from_legacy_backup(target_file, folder_name)
+
+    def may_replace(self, target_file: str, folder_name: str, digest: str, bundled_hash: Optional[str]) -> bool:
+        """Whether a backup may be put in place of target_file, whose current digest is digest.
+
+        Only the unlocked DLL or a stored original is replaced. Anything else,
+        e.g. a newer original installed by a Windows update, is left to sfc.
+        """
+        if digest == bundled_hash or any(e.sha256 == digest for e in self.backup_store.generations(target_file)):
+            return True
+        self.log(f"{folder_name} file is neither the unlocked DLL nor a backed-up original "
+                 f"(it may have been updated by Windows) -- not replacing it with an older backup")
+        return False
+
+    def restore_from_legacy_backup(self, target_file: str, folder_name: str) -> bool:
+        """Put back a <file>.backup left next to the target by earlier versions.
+
+        The backup is imported into the backup store first, so it is restored
+        the same way as any stored original and kept once the file is gone.
+        """
+        backup_path = target_file + BACKUP_SUFFIX
+        if not os.path.exists(backup_path):
+            self.log(f"No backup found for {folder_name}")
+            return False
+
+        try:
+            problem = self.legacy_backup_problem(backup_path, folder_name)
+            if problem:
+                self.log(f"Backup for {folder_name} {problem} -- not trusted")
+                return False
+
+            entry = self.backup_store.add(target_file, source="legacy", content_path=backup_path)
+            self.log(f"Imported {folder_name} backup from an earlier version (version {entry.version})")
+            if os.path.exists(target_file):
+                digest = hash_file(target_file)
+                if digest == entry.sha256:
+                    self.log(f"{folder_name} file is already the original")
+                    return True
+                bundled_path = bundled_dll_path(folder_name)
+                bundled_hash = hash_file(bundled_path) if bundled_path.exists() else None
+                if not self.may_replace(target_file, folder_name, digest, bundled_hash):
+                    return False
+                if not self.grant_access(target_file, folder_name):
+                    return False
+
+            self.journal.record("restore", target_file, entry.sha256, backup=backup_path)
+            with self.tracer.span("copy", folder=folder_name, bytes=entry.size):
+                self.backup_store.restore(target_file, entry)
+            self.journal.complete(target_file)
+            self.log(f"Restored {folder_name} file from backup")
+            return True
+
+        except Exception as e:
+            self.log(f"Error restoring {folder_name} from backup: {str(e)}")
+            return False
+
+    def legacy_backup_problem(self, backup_path: str, folder_name: str) -> Optional[str]:
+        """Why a <file>.backup cannot be trusted as the original, or None if it can.
+
+        Released versions wrote no checksum, so a backup must look like a real
+        system DLL and must not be a copy of the bundled replacement. A checksum
+        written next to it, if any, still has to match.
+        """
+        size = os.path.getsize(backup_path)
+        if not LEGACY_BACKUP_MIN_BYTES <= size <= LEGACY_BACKUP_MAX_BYTES:
+            return f"has an unexpected size ({size} bytes)"
+        with open(backup_path, "rb") as f:
+            if f.read(2) != b"MZ":
+                return "is not a DLL"
+        if read_file_version(backup_path) is None:
+            return "has no version information"
+
+        digest = hash_file(backup_path)
+        bundled_path = bundled_dll_path(folder_name)
+        if bundled_path.exists() and digest == hash_file(bundled_path):
+            return "is the unlocked DLL, not the original"
+        try:
+            expected = Path(backup_path + DIGEST_SUFFIX).read_text(encoding="ascii").strip()
+        except OSError:
+            return None
+        return "does not match its recorded checksum" if digest != expected else None
+
+    def scan_file(self, target_file: str) -> bool:
+        """Repair a single file with sfc /scanfile. Returns True if sfc succeeded."""
+        self.token.check()
+        folder_name = "System32" if "System32" in target_file else "SysWOW64"
+        self.log(f"Running sfc /scanfile on {folder_name} file...")
+        try:
+            returncode = self.run_sfc([f"/scanfile={target_file}"])
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            self.log(f"Error running sfc: {str(e)}")
+            return False
+
+        if returncode == 0 and self.sfc_verdict not in FAILED_VERDICTS and os.path.exists(target_file):
+            return True
+        self.log(f"sfc could not restore {folder_name} file (code {returncode})")
+        return False
+
+    def full_scan_operation(self) -> Tuple[bool, str]:
+        """Perform restore operation using sfc /scannow"""
+        self.token.check()
+        self.log("Starting system file checker...")
+        try:
+            returncode = self.run_sfc(["/scannow"])
+            if returncode == 0 and self.sfc_verdict not in FAILED_VERDICTS:
+                return True, "System file check completed"
+            elif returncode == 0:
+                return False, f"SFC could not restore all files ({self.sfc_verdict})"
+            else:
+                return False, f"SFC returned error code: {returncode}"
+
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            return False, f"Error running sfc: {str(e)}"
+
+    def tool_available(self, tool: str) -> bool:
+        """Whether sfc or DISM can be started, from the system profile unless the tool is substituted"""
+        if tool in self.processes.tools:
+            return True
+        return {"sfc": self.profile.sfc_available, "dism": self.profile.dism_available}.get(tool, True)
+
+    def restore_health(self) -> bool:
+        """Repair the component store sfc restores from with DISM. Returns True if DISM succeeded."""
+        self.token.check()
+        self.log("Running DISM /RestoreHealth...")
+        try:
+            returncode = self.run_tool("dism", ["/Online", "/Cleanup-Image", "/RestoreHealth"], DismOutputParser())
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            self.log(f"Error running DISM: {str(e)}")
+            return False
+
+        if returncode == 0 and self.dism_verdict == DISM_RESTORED:
+            return True
+        self.log(f"DISM could not repair the component store (code {returncode}, {self.dism_verdict or 'no verdict'})")
+        return False
+
+    def run_sfc(self, args: List[str]) -> int:
+        """Run sfc with the given arguments, streaming its output to the log. Returns the exit code."""
+        return self.run_tool("sfc", args, SfcOutputParser())
+
+    def run_tool(self, tool: str, args: List[str], parser: SfcOutputParser) -> int:
+        """Run sfc or DISM, streaming its parsed output to the log and progress bar. Returns the exit code."""
+        if tool == "dism":
+            self.dism_verdict = None
+        else:
+            self.sfc_verdict = None
+        self.token.check()
+        with self.tracer.span(tool, args=" ".join(args)) as span:
+            # Own process group so cancel() can stop it without blocking
+            self.process = self.processes.start(tool, args)
+            if self.token.cancelled:
+                stop_process(self.process)
+
+            throttle = ProgressThrottle()
+            for chunk in iter(lambda: self.process.stdout.read1(4096), b""):
+                self.handle_sfc_events(parser.feed(chunk), throttle)
+            self.handle_sfc_events(parser.close(), throttle)
+
+            self.process.wait()
+            if tool == "dism":
+                self.dism_verdict = parser.verdict
+            else:
+                self.sfc_verdict = parser.verdict
+            span.set(exit_code=self.process.returncode, verdict=parser.verdict)
+        self.token.check()
+        return self.process.returncode
+
+    def handle_sfc_events(self, events, throttle: ProgressThrottle):
+        """Forward parsed sfc or DISM events: percentages to the progress bar, everything else to the log"""
+        for event in events:
+            if event.kind == PROGRESS:
+                if throttle.ready(event.percent):
+                    self.progress(event.percent)
+            elif event.kind == PHASE:
+                self.progress(0)
+                self.log(event.text)
+            else:
+                self.log(event.text)
+
+    def process_dll_file(self, target_file: str, folder_name: str) -> bool:
+        """Process a single DLL file (take ownership, grant permissions, delete)"""
+        if not os.path.exists(target_file):
+            self.log(f"{folder_name} file not present -- skipping")
+            return True  # Not an error if file doesn't exist
+
+        try:
+            # Back up the current file unless it is already our replacement
+            bundled_path = bundled_dll_path(folder_name)
+            if bundled_path.exists() and hash_file(target_file) == hash_file(bundled_path):
+                self.log(f"{folder_name} file is already unlocked -- keeping existing backups")
+            else:
+                with self.tracer.span("backup", folder=folder_name) as span:
+                    entry = self.backup_store.add(target_file)
+                    span.set(bytes=entry.size)
+                self.log(f"Backed up {folder_name} file (version {entry.version or 'unknown'})")
+
+            if not self.grant_access(target_file, folder_name):
+                return False
+
+            # Delete file
+            self.log(f"Deleting {folder_name} file...")
+            try:
+                self.journal.record("delete", target_file, self.original_digest(target_file, folder_name))
+                with self.tracer.span("delete", folder=folder_name):
+                    os.remove(target_file)
+                self.journal.complete(target_file)
+                self.deleted_targets.append(target_file)
+            except Exception as e:
+                self.log(f"Error deleting {folder_name}: {str(e)}")
+                return False
+
+            if not os.path.exists(target_file):
+                self.log(f"Successfully deleted {folder_name} file.")
+                return True
+            else:
+                self.log(f"Failed to delete {folder_name} file.")
+                return False
+
+        except Exception as e:
+            self.log(f"Error processing {folder_name}: {str(e)}")
+            return False
+    
+    def grant_access(self, target_file: str, folder_name: str) -> bool:
+        """Take ownership of a system file and grant Administrators full control"""
+        self.log(f"Taking ownership of {folder_name} file...")
+        with self.tracer.span("takeown", folder=folder_name) as span:
+            result = self.processes.run("takeown", ["/f", target_file, "/a"])
+            span.set(exit_code=result.returncode)
+
+        if result.returncode != 0:
+            self.log(f"Failed to take ownership: {result.stderr.strip()}")
+            return False
+
+        self.log(f"Granting permissions for {folder_name}...")
+        with self.tracer.span("icacls", folder=folder_name) as span:
+            result = self.processes.run("icacls", [target_file, "/grant", "Administrators:F"])
+            span.set(exit_code=result.returncode)
+
+        if result.returncode != 0:
+            self.log(f"Failed to grant permissions: {result.stderr.strip()}")
+            return False
+        return True
+
+    def copy_custom_dlls(self):
+        """Copy custom DLL files to system directories. Returns True if all copies succeed."""
+        self.log("Copying custom DLL files...")
+        success = True
+        try:
+            if is_64bit_system():
+                if not self.copy_dll_file("64-bit", "System32"):
+                    success = False
+                if not self.copy_dll_file("64-bit", "SysWOW64"):
+                    success = False
+            else:
+                if not self.copy_dll_file("32-bit", "System32"):
+                    success = False
+        except Exception as e:
+            self.log(f"Error copying custom DLLs: {str(e)}")
+            success = False
+        return success
+
+    def copy_dll_file(self, arch_folder: str, system_folder: str) -> bool:
+        """Copy a specific DLL file. Returns True if copy succeeds."""
+        src_path = Path(resource_path(f"dll/{arch_folder}/{system_folder}/{DLL_NAME}"))
+        dst_path = Path(self.profile.system_root) / system_folder / DLL_NAME
+        
+        if src_path.exists():
+            try:
+                self.journal.record("copy", str(dst_path), self.original_digest(str(dst_path), system_folder))
+                with self.tracer.span("copy", folder=system_folder, bytes=src_path.stat().st_size):
+                    shutil.copy2(str(src_path), str(dst_path))
+                self.journal.complete(str(dst_path))
+                self.log(f"Copied custom DLL to {system_folder}")
+                return True
+            except Exception as e:
+                self.log(f"Error copying DLL to {system_folder}: {str(e)}")
+                return False
+        else:
+            self.log(f"❌ Custom DLL not found for {system_folder}")
+            return False
@@ -0,0 +1,779 @@
+"""PyQt5 user interface, imported by main.py only when the GUI is requested"""
+import sys
+import logging
+from pathlib import Path
+from PyQt5.QtWidgets import (
+    QApplication, QMainWindow, QPushButton, QMessageBox, 
+    QDesktopWidget, QPlainTextEdit, QLabel, QVBoxLayout, 
+    QHBoxLayout, QWidget, QFrame, QProgressBar, QDialog,
+    QComboBox, QLineEdit, QListWidget, QListWidgetItem, QFileDialog
+)
+from PyQt5.QtGui import QIcon, QFont, QPalette, QTextCursor
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal, QTimer
+from app_logging import OUTCOME_CANCELLED, OUTCOME_FAILED, OUTCOME_SUCCESS
+from history import LINES_PAGE_SIZE, OUTCOME_INCOMPLETE, OUTCOME_NONE, PAGE_SIZE, HistoryIndex
+from jobs import (HistoryJob, LogEvent, OperationJob, ProgressEvent, RecoveryJob, SessionLinesJob, TargetStateJob,
+                  VerifyPayloadJob, run_chain)
+from paths import resource_path
+from startup_timing import TIMER
+from system_profile import system_profile
+
+logger = logging.getLogger(__name__)
+
+def set_application_icon(app_or_window):
+    """Utility function to set icon for application or window"""
+    icon_path = Path(resource_path("assets/icon/icon.png"))
+    if icon_path.exists():
+        app_or_window.setWindowIcon(QIcon(str(icon_path)))
+
+class JobRunnable(QRunnable):
+    """Runs a chain of jobs on a pool thread, reporting back through the scheduler's signals"""
+
+    def __init__(self, scheduler, jobs: list, exclusive: bool):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.scheduler = scheduler
+        self.jobs = jobs
+        self.exclusive = exclusive
+
+    def run(self):
+        try:
+            run_chain(self.jobs, self.scheduler.event_signal.emit, self.scheduler.result_signal.emit)
+        finally:
+            self.scheduler.chain_finished_signal.emit(self)
+
+
+class JobScheduler(QObject):
+    """Runs jobs on the shared thread pool and delivers their events and results on the GUI thread.
+
+    Exclusive chains (operations that change system files) are tracked in
+    busy, and busy_changed is the only signal the window uses to enable or
+    disable its controls.
+    """
+    event_signal = pyqtSignal(object, object)
+    result_signal = pyqtSignal(object, object)
+    chain_finished_signal = pyqtSignal(object)
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool.globalInstance()
+        self.running = []
+        self.callbacks = {}
+        self.result_signal.connect(self.on_result)
+        self.chain_finished_signal.connect(self.on_chain_finished)
+
+    @property
+    def busy(self) -> bool:
+        return any(runnable.exclusive for runnable in self.running)
+
+    def submit(self, chain: list, exclusive: bool = False):
+        """Run a list of (job, callback) pairs in order; each callback receives that job's JobResult"""
+        was_busy = self.busy
+        for job, callback in chain:
+            if callback:
+                self.callbacks[job] = callback
+        runnable = JobRunnable(self, [job for job, callback in chain], exclusive)
+        self.running.append(runnable)
+        self.pool.start(runnable)
+        if exclusive and not was_busy:
+            self.busy_changed.emit(True)
+
+    def on_result(self, job, result):
+        callback = self.callbacks.pop(job, None)
+        if callback:
+            callback(result)
+
+    def on_chain_finished(self, runnable):
+        self.running.remove(runnable)
+        for job in runnable.jobs:
+            # Only left if the chain stopped before reporting every job
+            self.callbacks.pop(job, None)
+        if runnable.exclusive and not self.busy:
+            self.busy_changed.emit(False)
+
+
+class LogView(QPlainTextEdit):
+    """Read-only plain-text activity panel that renders messages in batches.
+
+    Messages are buffered and written on a timer tick, consecutive duplicates are
+    collapsed into a repeat counter, and only the last max_blocks lines are kept.
+    """
+
+    def __init__(self, max_blocks: int = 5000, flush_interval: int = 100):
+        super().__init__()
+        self.pending = []
+        self.last_message = None
+        self.repeat_count = 0
+        self.max_blocks = max_blocks
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_blocks)
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(flush_interval)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_timer.start()
+
+    def append_message(self, message: str):
+        """Queue a message for the next flush"""
+        self.pending.append(message)
+
+    def flush(self):
+        """Write all queued messages to the view in one pass"""
+        if not self.pending:
+            return
+        messages, self.pending = self.pending, []
+
+        lines = []
+        for message in messages:
+            if message == self.last_message:
+                self.repeat_count += 1
+                if lines:
+                    lines[-1] = self.format_repeat(message)
+                else:
+                    self.replace_last_line(self.format_repeat(message))
+                continue
+            self.last_message = message
+            self.repeat_count = 1
+            lines.append(message)
+
+        if lines:
+            # Lines beyond the block limit would be discarded straight away, so skip rendering them
+            self.appendPlainText("\n".join(lines[-self.max_blocks:]))
+        self.moveCursor(QTextCursor.End)
+
+    def format_repeat(self, message: str) -> str:
+        return f"{message} (x{self.repeat_count})"
+
+    def replace_last_line(self, text: str):
+        """Rewrite the last rendered line in place, used to bump a repeat counter"""
+        cursor = QTextCursor(self.document().lastBlock())
+        cursor.movePosition(QTextCursor.StartOfBlock)
+        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        cursor.insertText(text)
+
+
+class HistoryDialog(QDialog):
+    """Past sessions from the rotated logs, a page at a time, with filters and diagnostic export.
+
+    The index is refreshed and queried on the job pool; only the selected
+    session's lines are read, LINES_PAGE_SIZE at a time and also on the pool.
+    """
+
+    def __init__(self, scheduler: JobScheduler, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.index = HistoryIndex()
+        self.page = 0
+        self.total = 0
+        self.entries = []
+        self.lines_shown = 0
+        self.history_job = None
+        self.lines_job = None
+        self.setWindowTitle("Session History")
+        self.resize(900, 600)
+
+        layout = QVBoxLayout(self)
+
+        filter_layout = QHBoxLayout()
+        self.operation_filter = QComboBox()
+        self.operation_filter.addItems(["All operations", "unlock", "restore", "recover"])
+        self.outcome_filter = QComboBox()
+        self.outcome_filter.addItems(["All outcomes", OUTCOME_SUCCESS, OUTCOME_FAILED, OUTCOME_CANCELLED,
+                                      OUTCOME_INCOMPLETE, OUTCOME_NONE])
+        self.text_filter = QLineEdit()
+        self.text_filter.setPlaceholderText("Containing text...")
+        self.text_filter.returnPressed.connect(self.apply_filters)
+        self.operation_filter.currentIndexChanged.connect(self.apply_filters)
+        self.outcome_filter.currentIndexChanged.connect(self.apply_filters)
+        search_button = QPushButton("Search")
+        search_button.clicked.connect(self.apply_filters)
+        for widget in (self.operation_filter, self.outcome_filter, self.text_filter, search_button):
+            filter_layout.addWidget(widget)
+        layout.addLayout(filter_layout)
+
+        self.session_list = QListWidget()
+        self.session_list.currentRowChanged.connect(self.show_session)
+        layout.addWidget(self.session_list, 1)
+
+        page_layout = QHBoxLayout()
+        self.previous_button = QPushButton("◀ Newer")
+        self.previous_button.clicked.connect(lambda: self.load_page(self.page - 1, refresh=False))
+        self.next_button = QPushButton("Older ▶")
+        self.next_button.clicked.connect(lambda: self.load_page(self.page + 1, refresh=False))
+        self.page_label = QLabel("Loading...")
+        self.export_button = QPushButton("Export diagnostic bundle...")
+        self.export_button.clicked.connect(self.export_session)
+        page_layout.addWidget(self.previous_button)
+        page_layout.addWidget(self.page_label)
+        page_layout.addWidget(self.next_button)
+        page_layout.addStretch()
+        page_layout.addWidget(self.export_button)
+        layout.addLayout(page_layout)
+
+        self.session_view = QPlainTextEdit()
+        self.session_view.setReadOnly(True)
+        self.session_view.setFont(QFont("Consolas", 9))
+        layout.addWidget(self.session_view, 2)
+        self.more_button = QPushButton("Show more lines")
+        self.more_button.clicked.connect(self.show_more_lines)
+        layout.addWidget(self.more_button)
+
+        self.update_buttons()
+        self.load_page(0, refresh=True)
+
+    def filters(self) -> dict:
+        return {
+            "operation": self.operation_filter.currentText() if self.operation_filter.currentIndex() else None,
+            "outcome": self.outcome_filter.currentText() if self.outcome_filter.currentIndex() else None,
+            "text": self.text_filter.text().strip() or None,
+        }
+
+    def apply_filters(self):
+        self.load_page(0, refresh=False)
+
+    def load_page(self, page: int, refresh: bool):
+        """Query one page of sessions in the background"""
+        self.page_label.setText("Loading...")
+        job = HistoryJob(self.index, max(page, 0), refresh, **self.filters())
+        self.history_job = job
+        self.scheduler.submit([(job, lambda result: self.on_page(job, result))])
+
+    def on_page(self, job, result):
+        """Show a page of sessions, unless a newer query has been started since"""
+        if job is not self.history_job:
+            return
+        if not result.success:
+            self.page_label.setText(f"Could not read history: {result.message}")
+            return
+        self.entries, self.total = result.data
+        self.page = job.page
+        self.session_list.clear()
+        for entry in self.entries:
+            item = QListWidgetItem(entry.describe())
+            item.setToolTip(f"Session {entry.session or 'unknown'}")
+            self.session_list.addItem(item)
+        self.page_label.setText(f"Page {self.page + 1} of {self.page_count()} ({self.total} sessions)")
+        self.session_view.clear()
+        self.update_buttons()
+
+    def page_count(self) -> int:
+        return max(1, (self.total + PAGE_SIZE - 1) // PAGE_SIZE)
+
+    def update_buttons(self):
+        entry = self.selected_entry()
+        self.previous_button.setEnabled(self.page > 0)
+        self.next_button.setEnabled(self.page + 1 < self.page_count())
+        self.export_button.setEnabled(entry is not None)
+        self.more_button.setEnabled(entry is not None and self.lines_job is None and self.lines_shown < entry.lines)
+
+    def selected_entry(self):
+        row = self.session_list.currentRow()
+        return self.entries[row] if 0 <= row < len(self.entries) else None
+
+    def show_session(self, row: int):
+        """Show the first page of lines of the selected session"""
+        self.session_view.clear()
+        self.lines_shown = 0
+        self.lines_job = None
+        if self.selected_entry():
+            self.show_more_lines()
+        self.update_buttons()
+
+    def show_more_lines(self):
+        """Read the next page of lines of the selected session in the background"""
+        entry = self.selected_entry()
+        if entry is None or self.lines_job is not None:
+            return
+        job = SessionLinesJob(self.index, entry, self.lines_shown, LINES_PAGE_SIZE)
+        self.lines_job = job
+        self.scheduler.submit([(job, lambda result: self.on_lines(job, result))])
+        self.update_buttons()
+
+    def on_lines(self, job, result):
+        """Append a page of lines, unless another session has been selected since"""
+        if job is not self.lines_job:
+            return
+        self.lines_job = None
+        if not result.success:
+            self.session_view.appendPlainText(f"Could not read the session: {result.message}")
+        else:
+            self.session_view.appendPlainText("\n".join(result.data))
+            self.lines_shown += len(result.data)
+        self.update_buttons()
+
+    def export_session(self):
+        """Save the selected session as a zip for a bug report"""
+        entry = self.selected_entry()
+        if entry is None:
+            return
+        default = str(self.index.log_dir / f"session-{entry.session or 'unknown'}.zip")
+        path, _ = QFileDialog.getSaveFileName(self, "Export Diagnostic Bundle", default, "Zip files (*.zip)")
+        if not path:
+            return
+        try:
+            bundle = self.index.export_bundle(entry, Path(path))
+        except OSError as e:
+            QMessageBox.critical(self, "Export Failed", f"Could not write the bundle:\n{str(e)}")
+            return
+        QMessageBox.information(self, "Export Complete", f"Diagnostic bundle saved to:\n{bundle}")
+
+
+class BedrockUnlocker(QMainWindow):
+
+    def __init__(self, measure_startup: bool = False):
+        super().__init__()
+        self.scheduler = JobScheduler(self)
+        self.scheduler.event_signal.connect(self.on_job_event)
+        self.scheduler.busy_changed.connect(self.on_busy_changed)
+        self.operation_job = None
+        self.files_ok = False
+        self.close_requested = False
+        self.measure_startup = measure_startup
+        self.painted = False
+        self.profile = None
+        self.logger = logger
+        self.init_window()
+        self.init_ui()
+        TIMER.mark("window_created")
+
+    def paintEvent(self, event):
+        """After the first paint, start the work that used to delay showing the window"""
+        super().paintEvent(event)
+        if self.painted:
+            return
+        self.painted = True
+        TIMER.mark("first_paint")
+        if self.measure_startup:
+            QTimer.singleShot(0, QApplication.instance().quit)
+        else:
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Recovery, the files check and the target scan, run once the event loop is up"""
+        # Probed on a background thread since main() started; usually ready by now
+        try:
+            self.profile = system_profile()
+        except Exception as e:
+            # Without it no target path is known, so the controls stay disabled
+            self.append_log(f"❌ Could not examine the system: {str(e)}")
+            self.log_display.flush()
+            QMessageBox.critical(self, "System Check Failed", f"Could not examine the system:\n{str(e)}")
+            return
+        self.arch_label.setText(f"Architecture: {self.profile.architecture}")
+        self.append_log("Application started successfully")
+        self.append_log(f"System: {self.profile.os_name} (build {self.profile.os_build})")
+        self.append_log(f"Architecture: {self.profile.architecture}")
+        if self.profile.reboot_pending:
+            self.append_log("⚠️ Windows is waiting for a restart; restart before restoring if sfc may be needed")
+        self.check_required_files()
+        TIMER.mark("startup_finished")
+
+    def init_window(self):
+        """Initialize main window properties"""
+        self.setWindowTitle("MC Bedrock Unlocker v1.0")
+        self.setFixedSize(800, 500)
+        self.center_window()
+        set_application_icon(self)
+        self.setStyleSheet(self.get_stylesheet())
+
+    
+    def get_stylesheet(self) -> str:
+        """Return application stylesheet with regular button styling (white theme)"""
+        return """
+        QMainWindow {
+            background-color: #f8f8f8;
+            color: #222222;
+        }
+        QPushButton {
+            background-color: #e0e0e0;
+            border: 2px solid #cccccc;
+            border-radius: 0px;
+            padding: 8px;
+            font-weight: bold;
+            color: #222222;
+        }
+        QPushButton:hover {
+            background-color: #f0f0f0;
+            border-color: #b0b0b0;
+        }
+        QPushButton:pressed {
+            background-color: #d0d0d0;
+        }
+        QPushButton:disabled {
+            background-color: #f4f4f4;
+            border-color: #e0e0e0;
+            color: #aaaaaa;
+        }
+        QPlainTextEdit {
+            background-color: #ffffff;
+            border: 1px solid #cccccc;
+            border-radius: 4px;
+            padding: 4px;
+            color: #222222;
+            font-family: monospace;
+        }
+        QLabel {
+            color: #222222;
+        }
+        QProgressBar {
+            background-color: #ffffff;
+            border: 1px solid #cccccc;
+            border-radius: 4px;
+            text-align: center;
+            color: #222222;
+        }
+        QProgressBar::chunk {
+            background-color: #b0b0b0;
+        }
+        """
+
+    def center_window(self):
+        """Center window on screen"""
+        qr = self.frameGeometry()
+        cp = QDesktopWidget().availableGeometry().center()
+        qr.moveCenter(cp)
+        self.move(qr.topLeft())
+
+    def init_ui(self):
+        """Initialize user interface"""
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        
+        # Main layout
+        layout = QVBoxLayout(central_widget)
+        layout.setSpacing(20)
+        layout.setContentsMargins(30, 30, 30, 30)
+        
+        # Title
+        title_label = QLabel("MC Bedrock Unlocker")
+        title_label.setAlignment(Qt.AlignCenter)
+        title_label.setFont(QFont("Arial", 24, QFont.Bold))
+        layout.addWidget(title_label)
+        
+        # Button layout
+        button_layout = QHBoxLayout()
+        button_layout.setSpacing(20)
+        
+        # Unlock button
+        self.unlock_button = QPushButton("🔓 Unlock Bedrock")
+        self.unlock_button.setFont(QFont("Arial", 14, QFont.Bold))
+        self.unlock_button.setMinimumHeight(50)
+        self.unlock_button.clicked.connect(self.unlock_action)
+        button_layout.addWidget(self.unlock_button)
+        
+        # Restore button
+        self.restore_button = QPushButton("🔄 Restore Original")
+        self.restore_button.setFont(QFont("Arial", 14, QFont.Bold))
+        self.restore_button.setMinimumHeight(50)
+        self.restore_button.clicked.connect(self.restore_action)
+        button_layout.addWidget(self.restore_button)
+        
+        # Cancel button, only shown while an operation runs
+        self.cancel_button = QPushButton("✖ Cancel")
+        self.cancel_button.setFont(QFont("Arial", 14, QFont.Bold))
+        self.cancel_button.setMinimumHeight(50)
+        self.cancel_button.clicked.connect(self.cancel_action)
+        self.cancel_button.setVisible(False)
+        button_layout.addWidget(self.cancel_button)
+        
+        layout.addLayout(button_layout)
+
+        # Progress of long-running sfc scans
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+        
+        # Info layout
+        info_layout = QHBoxLayout()
+        
+        # System info
+        self.arch_label = QLabel("Architecture: checking...")
+        self.arch_label.setFont(QFont("Arial", 10))
+        info_layout.addWidget(self.arch_label)
+
+        # Current state of the target files, filled in by refresh_target_states
+        self.state_label = QLabel("Files: checking...")
+        self.state_label.setFont(QFont("Arial", 10))
+        info_layout.addWidget(self.state_label)
+        
+        info_layout.addStretch()
+
+        # Past sessions from the log files
+        history_button = QPushButton("History")
+        history_button.setFont(QFont("Arial", 10))
+        history_button.clicked.connect(self.show_history)
+        info_layout.addWidget(history_button)
+        
+        # Credit
+        credit_label = QLabel("Created by: dheemansa")
+        credit_label.setFont(QFont("Arial", 10))
+        info_layout.addWidget(credit_label)
+        
+        layout.addLayout(info_layout)
+        
+        # Log display
+        log_label = QLabel("Activity Log:")
+        log_label.setFont(QFont("Arial", 12, QFont.Bold))
+        layout.addWidget(log_label)
+        
+        self.log_display = LogView()
+        self.log_display.setFont(QFont("Consolas", 10))
+        self.log_display.setMinimumHeight(200)
+        layout.addWidget(self.log_display)
+
+        # Nothing can be clicked until finish_startup has checked the files
+        self.update_controls()
+
+    def append_log(self, message: str):
+        """Write message to the logger and queue it for the log display"""
+        self.logger.info(message)
+        self.log_display.append_message(message)
+
+    def update_progress(self, percent: int):
+        """Show the latest sfc percentage in the progress bar"""
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(percent)
+
+    def set_ui_enabled(self, enabled: bool):
+        """Enable/disable UI elements during operations"""
+        self.unlock_button.setEnabled(enabled)
+        self.restore_button.setEnabled(enabled)
+
+    def update_controls(self):
+        """The one place the action buttons are enabled: files verified and no operation running.
+
+        While an operation runs the Cancel button is shown instead.
+        """
+        running = self.scheduler.busy
+        self.set_ui_enabled(self.files_ok and not running)
+        self.cancel_button.setEnabled(running)
+        self.cancel_button.setVisible(running)
+
+    def on_busy_changed(self, busy: bool):
+        """Update the controls, and close the window once a cancelled operation has wound down if requested"""
+        self.update_controls()
+        if not busy and self.close_requested:
+            self.close()
+
+    def on_job_event(self, job, event):
+        """Route typed job events: log lines to the log display, percentages to the progress bar"""
+        if isinstance(event, LogEvent):
+            self.log_display.append_message(event.message)
+        elif isinstance(event, ProgressEvent):
+            self.update_progress(event.percent)
+
+    def cancel_action(self):
+        """Handle cancel button click"""
+        if self.operation_job and self.scheduler.busy:
+            self.cancel_button.setEnabled(False)
+            self.append_log("Cancelling, finishing the current step...")
+            self.operation_job.cancel()
+
+    def unlock_action(self):
+        """Handle unlock button click"""
+        if not self.profile.admin:
+            QMessageBox.warning(
+                self,
+                "Administrator Required",
+                "This application requires administrator privileges to modify system files.\n"
+                "Please restart as administrator."
+            )
+            return
+
+        reply = QMessageBox.question(
+            self,
+            "Confirm Unlock",
+            "This will modify system DLL files to unlock Minecraft Bedrock.\n\n"
+            "⚠️ Warning: This modifies system files. Ensure you have:\n"
+            "• Created a system restore point\n"
+            "• Backed up important data\n"
+            "• Custom DLL files in the 'dll' folder\n\n"
+            "Continue?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+
+        if reply == QMessageBox.Yes:
+            self.start_unlock_operation()
+
+    def restore_action(self):
+        """Handle restore button click"""
+        if not self.profile.admin:
+            QMessageBox.warning(
+                self,
+                "Administrator Required",
+                "Administrator privileges required for system file restoration."
+            )
+            return
+
+        reply = QMessageBox.question(
+            self,
+            "Confirm Restore",
+            "This will restore the original system files from the backups made during unlock.\n\n"
+            "If a backup is missing or damaged, 'sfc' is used to repair the affected files instead.\n"
+            "⚠️ A full 'sfc /scannow' is only run as a last resort; it may take 10-30 minutes.\n\n"
+            + ("⚠️ Windows is waiting for a restart. Until you restart, sfc may be very slow or fail.\n\n"
+               if self.profile.reboot_pending else "")
+            + "Continue?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+
+        if reply == QMessageBox.Yes:
+            self.start_restore_operation()
+
+    def start_unlock_operation(self):
+        """Verify the payload, unlock, then re-scan the target files"""
+        self.start_operation("unlock", [(VerifyPayloadJob(), self.on_files_checked)])
+
+    def start_restore_operation(self):
+        """Restore, then re-scan the target files"""
+        self.start_operation("restore", [])
+
+    def start_operation(self, operation: str, checks: list):
+        """Queue an operation after its checks and before a fresh target scan, blocking the controls"""
+        self.append_log("=" * 50)
+        self.append_log(f"Starting {operation} operation...")
+
+        self.operation_job = OperationJob(operation)
+        self.scheduler.submit(
+            checks + [
+                (self.operation_job, self.on_operation_finished),
+                (TargetStateJob(), self.on_target_states),
+            ],
+            exclusive=True
+        )
+
+    def on_operation_finished(self, result):
+        """Handle operation completion"""
+        self.progress_bar.setVisible(False)
+        if result.skipped:
+            self.append_log(f"⚠️ Operation not started: {result.message}")
+            self.append_log("=" * 50)
+            return
+        self.show_step_summary(result.summary or [])
+        self.append_log("=" * 50)
+        success, message = result.success, result.message
+
+        if result.cancelled and not result.timed_out:
+            self.append_log(f"⚠️ {message}")
+        elif success:
+            self.append_log(f"✅ {message}")
+            self.log_display.flush()
+            QMessageBox.information(self, "Success", message)
+        else:
+            self.append_log(f"❌ Operation failed: {message}")
+            self.log_display.flush()
+            QMessageBox.critical(self, "Error", f"Operation failed:\n{message}")
+
+    def show_step_summary(self, lines: list):
+        """Show how long each step of the finished operation took"""
+        self.log_display.append_message("Step timings:")
+        for line in lines:
+            self.log_display.append_message(line)
+
+    def refresh_target_states(self):
+        """Re-scan what is installed at each target path in the background"""
+        self.scheduler.submit([(TargetStateJob(), self.on_target_states)])
+
+    def on_target_states(self, result):
+        """Show the state of each target file next to the architecture"""
+        states = result.data if result.success else []
+        if not result.success:
+            self.logger.warning(f"Could not determine file state: {result.message}")
+        if not states:
+            self.state_label.setText("Files: unknown")
+            return
+        parts = []
+        for target in states:
+            text = f"{target.folder} {target.state}"
+            if target.version:
+                text += f" ({target.version})"
+            parts.append(text)
+        self.state_label.setText("Files: " + ", ".join(parts))
+        self.logger.info(self.state_label.text())
+
+    def show_history(self):
+        """Open the session history browser"""
+        self.log_display.flush()
+        HistoryDialog(self.scheduler, self).exec_()
+
+    def on_recovery_finished(self, result):
+        """Report a rollback of an operation left half-done by a crash, then scan the target files"""
+        if result.data is not None or not result.success:
+            self.append_log(result.message if result.success else f"❌ {result.message}")
+        self.refresh_target_states()
+
+    def check_required_files(self):
+        """Roll back an interrupted operation, then verify the required DLL files; the UI stays disabled until then."""
+        self.files_ok = False
+        self.update_controls()
+        self.append_log("Running files check, please wait...")
+        # Recovery may change system files, so the chain is exclusive like an operation
+        self.scheduler.submit(
+            [(RecoveryJob(), self.on_recovery_finished), (VerifyPayloadJob(), self.on_files_checked)],
+            exclusive=True
+        )
+
+    def on_files_checked(self, result):
+        """Report the result of the required files check"""
+        problems, verified = result.data if result.data else ([("files check", result.message)], False)
+        if not problems:
+            # Re-checks before an unlock stay quiet
+            if not self.files_ok:
+                if verified:
+                    self.append_log("All required DLL files found and verified. Ready to use.")
+                else:
+                    self.append_log("All required DLL files found (no manifest, integrity not verified). Ready to use.")
+            self.files_ok = True
+        else:
+            self.append_log("❌ Necessary files are missing or damaged:")
+            for path, problem in problems:
+                self.append_log(f"{path}: {problem}")
+            self.log_display.flush()
+            QMessageBox.critical(
+                self,
+                "Missing Files",
+                "Necessary files are missing or damaged.\nPlease report this issue to the developers with necessary information."
+            )
+            self.files_ok = False
+        self.update_controls()
+
+    def closeEvent(self, event):
+        """Handle application close event"""
+        if self.scheduler.busy:
+            if self.close_requested:
+                event.ignore()
+                return
+            reply = QMessageBox.question(
+                self,
+                "Operation in Progress",
+                "An operation is currently running. Cancel it and close?\n\n"
+                "The current step is allowed to finish so no file is left half-replaced.",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            if reply == QMessageBox.Yes:
+                # The window closes from on_busy_changed once the operation has wound down
+                self.close_requested = True
+                self.cancel_action()
+            event.ignore()
+        else:
+            self.log_display.flush()
+            event.accept()
+
+
+def run_gui(measure_startup: bool = False) -> int:
+    """Start the Qt application and block until the window is closed"""
+    app = QApplication(sys.argv)
+    app.setApplicationName("MC Bedrock Unlocker")
+    app.setApplicationVersion("2.0")
+    
+    set_application_icon(app)
+    
+    window = BedrockUnlocker(measure_startup)
+    window.show()
+    
+    return app.exec_()
@@ -0,0 +1,309 @@
+"""Index of past sessions in the rotated log files, for paging, filtering and export"""
+import gzip
+import hashlib
+import json
+import re
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from app_logging import LOG_FILE_NAME, LOG_BACKUP_COUNT, SESSION_ID
+from cancellation import CancellationToken
+from integrity import write_json_atomic
+from paths import data_directory, log_directory
+from system_profile import system_profile
+
+INDEX_NAME = "history_index.json"
+INDEX_VERSION = 1
+PAGE_SIZE = 50
+LINES_PAGE_SIZE = 500
+# Sessions whose last operation never logged its end were cut short
+OUTCOME_INCOMPLETE = "incomplete"
+OUTCOME_NONE = "none"
+
+_TIMESTAMP_PATTERN = re.compile(rb"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+_SESSION_PATTERN = re.compile(rb"Session ([0-9a-f]+) started")
+_OPERATION_STARTED_PATTERN = re.compile(rb"Operation (\w+) started")
+_OPERATION_FINISHED_PATTERN = re.compile(rb"Operation (\w+) finished: (\w+)")
+_HEAD_BYTES = 256
+
+
+class SessionEntry(NamedTuple):
+    """One application session; pieces are (log file, start, end) byte ranges, oldest first"""
+    session: Optional[str]
+    started: Optional[str]
+    ended: Optional[str]
+    operations: List[Tuple[str, str]]
+    lines: int
+    pieces: List[Tuple[str, int, int]]
+
+    @property
+    def outcome(self) -> str:
+        return self.operations[-1][1] if self.operations else OUTCOME_NONE
+
+    def matches(self, operation: Optional[str] = None, outcome: Optional[str] = None) -> bool:
+        """Whether one of the operations matches both filters, None matching anything.
+
+        OUTCOME_NONE matches a session without operations.
+        """
+        if outcome == OUTCOME_NONE:
+            return operation is None and not self.operations
+        if operation is None and outcome is None:
+            return True
+        return any((operation is None or op == operation) and (outcome is None or result == outcome)
+                   for op, result in self.operations)
+
+    def describe(self) -> str:
+        operations = ", ".join(f"{operation} {outcome}" for operation, outcome in self.operations) or "no operation"
+        return f"{self.started or 'unknown time'}  {operations}  ({self.lines} lines)"
+
+
+def _open_segment(path: Path):
+    return gzip.open(path, "rb") if path.suffix == ".gz" else open(path, "rb")
+
+
+def _timestamp(line: bytes) -> Optional[str]:
+    match = _TIMESTAMP_PATTERN.search(line, 0, 64)
+    return match.group(1).decode("ascii") if match else None
+
+
+def _new_piece(session: Optional[str], start: int, started: Optional[str]) -> Dict:
+    return {"session": session, "start": start, "end": start, "started": started, "ended": started,
+            "operations": [], "lines": 0}
+
+
+def index_lines(f, pieces: List[Dict], offset: int) -> int:
+    """Extend pieces with the complete lines read from f, starting at byte offset.
+
+    Returns the offset after the last complete line; a line still being written is left for later.
+    """
+    piece = pieces[-1] if pieces else None
+    for line in f:
+        if not line.endswith(b"\n"):
+            break
+        match = _SESSION_PATTERN.search(line)
+        if match or piece is None:
+            piece = _new_piece(match.group(1).decode("ascii") if match else None, offset, _timestamp(line))
+            pieces.append(piece)
+
+        started = _OPERATION_STARTED_PATTERN.search(line)
+        finished = _OPERATION_FINISHED_PATTERN.search(line)
+        if started:
+            piece["operations"].append([started.group(1).decode("ascii"), OUTCOME_INCOMPLETE])
+        elif finished:
+            operation, outcome = (group.decode("ascii") for group in finished.groups())
+            if piece["operations"] and piece["operations"][-1] == [operation, OUTCOME_INCOMPLETE]:
+                piece["operations"][-1][1] = outcome
+            else:
+                piece["operations"].append([operation, outcome])
+
+        offset += len(line)
+        piece["end"] = offset
+        piece["lines"] += 1
+        piece["ended"] = _timestamp(line) or piece["ended"]
+    return offset
+
+
+class HistoryIndex:
+    """Session boundaries, operations and outcomes of every log segment, kept in history_index.json.
+
+    Rotated segments never change, so each is indexed once, keyed by its size
+    and modification time because rotation renames it. The live log is indexed
+    incrementally from where the last refresh stopped. Queries only touch the
+    index; log contents are read a page at a time.
+    """
+
+    def __init__(self, log_dir: Optional[Path] = None):
+        self.log_dir = Path(log_dir) if log_dir else log_directory()
+        self.index_path = self.log_dir / INDEX_NAME
+        self.entries = []
+
+    def segments(self) -> List[Path]:
+        """Existing log files, oldest first"""
+        paths = [self.log_dir / f"{LOG_FILE_NAME}.{number}.gz" for number in range(LOG_BACKUP_COUNT, 0, -1)]
+        paths.append(self.log_dir / LOG_FILE_NAME)
+        return [path for path in paths if path.exists()]
+
+    def load(self) -> Dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, "segments": {}, "live": None}
+
+    def save(self, index: Dict):
+        write_json_atomic(self.index_path, index)
+
+    def refresh(self, token: Optional[CancellationToken] = None) -> List[SessionEntry]:
+        """Bring the index up to date with the log files and return all sessions, newest first.
+
+        token is checked before each log file; a cancelled refresh leaves the saved index as it was.
+        """
+        old = self.load()
+        index = {"version": INDEX_VERSION, "segments": {}, "live": None}
+        ordered = []
+
+        for path in self.segments():
+            if token:
+                token.check()
+            stat = path.stat()
+            if path.name == LOG_FILE_NAME:
+                index["live"] = self.index_live(path, stat.st_size, old.get("live"))
+                pieces = index["live"]["pieces"]
+            else:
+                key = f"{stat.st_size}:{stat.st_mtime_ns}"
+                pieces = old["segments"].get(key)
+                if pieces is None:
+                    pieces = []
+                    with _open_segment(path) as f:
+                        index_lines(f, pieces, 0)
+                index["segments"][key] = pieces
+            ordered.extend((path.name, piece) for piece in pieces)
+
+        if index != old:
+            self.save(index)
+        self.entries = self.merge(ordered)
+        return self.entries
+
+    def index_live(self, path: Path, size: int, previous: Optional[Dict]) -> Dict:
+        """Index the live log, continuing from the previous refresh if the file was only appended to"""
+        with open(path, "rb") as f:
+            head = hashlib.sha1(f.read(_HEAD_BYTES)).hexdigest()
+            if previous and previous["head"] == head and previous["indexed_bytes"] <= size:
+                pieces = previous["pieces"]
+                offset = previous["indexed_bytes"]
+            else:
+                pieces = []
+                offset = 0
+            f.seek(offset)
+            offset = index_lines(f, pieces, offset)
+        return {"head": head, "indexed_bytes": offset, "pieces": pieces}
+
+    @staticmethod
+    def merge(ordered: List[Tuple[str, Dict]]) -> List[SessionEntry]:
+        """Join pieces split by rotation into sessions, newest first"""
+        sessions = []
+        for name, piece in ordered:
+            byte_range = (name, piece["start"], piece["end"])
+            operations = [tuple(operation) for operation in piece["operations"]]
+            if piece["session"] is None and sessions:
+                # The start of a segment continues the last session of the older one
+                last = sessions[-1]
+                if (last.operations and operations and operations[0][1] != OUTCOME_INCOMPLETE
+                        and last.operations[-1] == (operations[0][0], OUTCOME_INCOMPLETE)):
+                    last.operations.pop()
+                sessions[-1] = last._replace(
+                    ended=piece["ended"] or last.ended,
+                    operations=last.operations + operations,
+                    lines=last.lines + piece["lines"],
+                    pieces=last.pieces + [byte_range],
+                )
+            else:
+                sessions.append(SessionEntry(piece["session"], piece["started"], piece["ended"],
+                                             operations, piece["lines"], [byte_range]))
+        sessions.reverse()
+        return sessions
+
+    def query(self, operation: Optional[str] = None, outcome: Optional[str] = None, text: Optional[str] = None,
+              page: int = 0, page_size: int = PAGE_SIZE) -> Tuple[List[SessionEntry], int]:
+        """One page of the sessions matching all given filters, and the number of matches"""
+        matches = [entry for entry in self.entries if entry.matches(operation, outcome)]
+        if text:
+            matches = self.matching_text(matches, text)
+        return matches[page * page_size:(page + 1) * page_size], len(matches)
+
+    def matching_text(self, entries: List[SessionEntry], text: str) -> List[SessionEntry]:
+        """Entries with a line containing text (case-insensitive), reading each log file once"""
+        needle = text.lower().encode("utf-8")
+        by_file = {}
+        for number, entry in enumerate(entries):
+            for name, start, end in entry.pieces:
+                by_file.setdefault(name, []).append((start, end, number))
+
+        found = set()
+        for name, ranges in by_file.items():
+            ranges.sort()
+            with _open_segment(self.log_dir / name) as f:
+                offset = 0
+                position = 0
+                for line in f:
+                    while position < len(ranges) and ranges[position][1] <= offset:
+                        position += 1
+                    if position == len(ranges):
+                        break
+                    start, end, number = ranges[position]
+                    if start <= offset and number not in found and needle in line.lower():
+                        found.add(number)
+                    offset += len(line)
+        return [entry for number, entry in enumerate(entries) if number in found]
+
+    def iter_lines(self, entry: SessionEntry) -> Iterator[str]:
+        """Lines of a session in order, read lazily from its log files"""
+        for name, start, end in entry.pieces:
+            try:
+                f = _open_segment(self.log_dir / name)
+            except OSError:
+                continue
+            with f:
+                f.seek(start)
+                offset = start
+                for line in f:
+                    if offset >= end:
+                        break
+                    offset += len(line)
+                    yield line.decode("utf-8", "replace").rstrip("\r\n")
+
+    def read_lines(self, entry: SessionEntry, start: int = 0, count: int = LINES_PAGE_SIZE,
+                   token: Optional[CancellationToken] = None) -> List[str]:
+        """Lines start to start + count of a session"""
+        lines = []
+        for number, line in enumerate(self.iter_lines(entry)):
+            if token:
+                token.check()
+            if number >= start + count:
+                break
+            if number >= start:
+                lines.append(line)
+        return lines
+
+    def export_bundle(self, entry: SessionEntry, destination: Optional[Path] = None) -> Path:
+        """Zip a session's log, traces recorded during it, backup index and system details for a bug report"""
+        if destination is None:
+            stamp = (entry.started or time.strftime("%Y-%m-%d %H:%M:%S")).replace(":", "").replace(" ", "-")
+            destination = self.log_dir / "diagnostics" / f"session-{stamp}-{entry.session or 'unknown'}.zip"
+        destination = Path(destination)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+
+        details = {
+            "session": entry.session,
+            "started": entry.started,
+            "ended": entry.ended,
+            "operations": entry.operations,
+            "exported_by_session": SESSION_ID,
+            "system": system_profile().as_dict(),
+        }
+        with zipfile.ZipFile(destination, "w", zipfile.ZIP_DEFLATED) as bundle:
+            with bundle.open("session.log", "w") as f:
+                for line in self.iter_lines(entry):
+                    f.write((line + "\n").encode("utf-8"))
+            bundle.writestr("details.json", json.dumps(details, indent=2))
+            for trace in self.session_traces(entry):
+                bundle.write(trace, f"traces/{trace.name}")
+            backup_index = data_directory() / "backups" / "index.json"
+            if backup_index.exists():
+                bundle.write(backup_index, "backups/index.json")
+        return destination
+
+    def session_traces(self, entry: SessionEntry) -> List[Path]:
+        """Trace files written between the first and last line of a session"""
+        traces_dir = self.log_dir / "traces"
+        if not entry.started or not traces_dir.is_dir():
+            return []
+        first = entry.started.replace("-", "").replace(":", "").replace(" ", "-")
+        last = (entry.ended or entry.started).replace("-", "").replace(":", "").replace(" ", "-")
+        return [trace for trace in sorted(traces_dir.glob("trace-*.json"))
+                if first <= trace.name[len("trace-"):len("trace-") + len(first)] <= last]
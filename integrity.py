@@ -0,0 +1,188 @@
+"""Integrity manifest for the bundled payload and a persistent file hash cache"""
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cancellation import CancellationToken
+from paths import data_directory
+
+MANIFEST_NAME = "payload_manifest.json"
+CACHE_NAME = "hash_cache.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_save_lock = threading.Lock()
+
+
+def hash_file(path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Return the hex SHA-256 digest of a file, hashing a memory map in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, size, chunk_size):
+                    digest.update(view[offset:offset + chunk_size])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+class HashCache:
+    """SHA-256 digests keyed by absolute path, reused while file identity, size and mtime are unchanged"""
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        self.cache_path = Path(cache_path) if cache_path else data_directory() / CACHE_NAME
+        self.entries = self.load()
+        # Keys hashed by this instance, written over whatever is on disk by save()
+        self.changed = set()
+        self.lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def sha256(self, path) -> str:
+        """Digest of path, hashing it only if it changed since it was last seen"""
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        with self.lock:
+            entry = self.entries.get(key)
+        if (entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+                and entry.get("ino") == st.st_ino):
+            return entry["sha256"]
+
+        digest = hash_file(key)
+        with self.lock:
+            self.entries[key] = {
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "ino": st.st_ino,
+                "sha256": digest,
+            }
+            self.changed.add(key)
+        return digest
+
+    def save(self):
+        """Merge the entries hashed here into the cache on disk, if anything changed, and prune missing files.
+
+        A payload check and a target scan may each save their own instance at the
+        same time, so the read-merge-write runs under a process-wide lock.
+        """
+        with self.lock:
+            if not self.changed:
+                return
+            changed = {key: self.entries[key] for key in self.changed}
+            self.changed = set()
+        try:
+            with _save_lock:
+                entries = self.load()
+                entries.update(changed)
+                # A onefile build unpacks to a new directory on every launch; drop paths that are gone
+                entries = {key: entry for key, entry in entries.items() if os.path.exists(key)}
+                write_json_atomic(self.cache_path, entries)
+        except OSError:
+            # The cache is only an optimisation
+            pass
+
+
+def write_json_atomic(path: Path, data, indent: Optional[int] = None, fsync: bool = False):
+    """Write data as JSON through a uniquely named temporary file and swap it in with os.replace.
+
+    fsync makes the contents durable before the swap, for files that must survive a power loss.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent, prefix=path.name + ".",
+                                     suffix=".tmp", delete=False) as f:
+        temp_path = f.name
+        json.dump(data, f, indent=indent)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    try:
+        os.replace(temp_path, path)
+    except OSError:
+        os.remove(temp_path)
+        raise
+
+
+def build_manifest(base_dir, datas) -> Dict[str, Dict]:
+    """Describe every file in PyInstaller-style (source, dest) datas pairs.
+
+    Keys are bundle-relative paths with forward slashes, as passed to resource_path.
+    """
+    base_dir = Path(base_dir)
+    manifest = {}
+    for source, dest in datas:
+        source_path = base_dir / source
+        files = [source_path] if source_path.is_file() else sorted(p for p in source_path.rglob("*") if p.is_file())
+        for file_path in files:
+            if source_path.is_file():
+                relative = Path(dest) / file_path.name
+            else:
+                relative = Path(dest) / file_path.relative_to(source_path)
+            manifest[relative.as_posix()] = {
+                "sha256": hash_file(file_path),
+                "size": file_path.stat().st_size,
+            }
+    return manifest
+
+
+def write_manifest(manifest_path, base_dir, datas):
+    """Generate the manifest at build time, called from main.spec"""
+    manifest = build_manifest(base_dir, datas)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"files": manifest}, f, indent=2, sort_keys=True)
+
+
+def load_manifest(manifest_path) -> Optional[Dict[str, Dict]]:
+    """Load a manifest, or return None if there is none (e.g. running from source)"""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)["files"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def verify_files(base_dir, relative_paths: List[str], manifest: Optional[Dict[str, Dict]],
+                 cache: Optional[HashCache] = None,
+                 token: Optional[CancellationToken] = None) -> List[Tuple[str, str]]:
+    """Check bundled files against the manifest. Returns (path, problem) pairs, empty if all is well.
+
+    Sizes are compared first so a truncated or replaced file is caught without hashing it.
+    Without a manifest only the presence of each file is checked. token is checked
+    before each file.
+    """
+    problems = []
+    for relative in relative_paths:
+        if token:
+            token.check()
+        path = os.path.join(base_dir, relative)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            problems.append((path, "missing"))
+            continue
+
+        expected = manifest.get(relative) if manifest is not None else None
+        if expected is None:
+            if manifest is not None:
+                problems.append((path, "not listed in manifest"))
+            continue
+        if size != expected["size"]:
+            problems.append((path, f"size mismatch (expected {expected['size']} bytes, found {size})"))
+            continue
+        digest = cache.sha256(path) if cache else hash_file(path)
+        if digest != expected["sha256"]:
+            problems.append((path, f"hash mismatch (expected {expected['sha256']}, found {digest})"))
+    return problems
@@ -0,0 +1,217 @@
+"""Background jobs with typed events and results, run one at a time or as a chain"""
+import logging
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+from cancellation import CancellationToken, OperationCancelled
+from core import OperationRunner, recover_interrupted_operation, scan_target_states, verify_payload
+from history import LINES_PAGE_SIZE, HistoryIndex, SessionEntry
+
+# Generous limits: a restore may need DISM and a full sfc scan
+OPERATION_TIMEOUTS = {
+    "unlock": 10 * 60,
+    "restore": 3 * 60 * 60,
+}
+VERIFY_TIMEOUT = 2 * 60
+TARGET_STATE_TIMEOUT = 60
+HISTORY_TIMEOUT = 60
+
+logger = logging.getLogger(__name__)
+
+
+class LogEvent(NamedTuple):
+    """A line for the activity log"""
+    message: str
+
+
+class ProgressEvent(NamedTuple):
+    """Percentage of the current step, e.g. an sfc or DISM scan"""
+    percent: int
+
+
+class JobResult(NamedTuple):
+    """Outcome of one job; data holds whatever the job produced"""
+    name: str
+    success: bool
+    message: str
+    cancelled: bool = False
+    timed_out: bool = False
+    duration: float = 0.0
+    summary: Optional[List[str]] = None
+    data: object = None
+    skipped: bool = False
+
+
+class Job:
+    """A unit of background work. Subclasses implement execute() and report through emit.
+
+    A job that outlives its timeout is cancelled the same way the Cancel button
+    cancels it, so it still stops at a safe point.
+    """
+    name = "job"
+    timeout: Optional[float] = None
+    # Read-only jobs still run in a chain after an earlier job failed
+    runs_after_failure = False
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.token = CancellationToken()
+        self.timed_out = False
+        if timeout is not None:
+            self.timeout = timeout
+
+    def execute(self, emit: Callable[[object], None]) -> JobResult:
+        raise NotImplementedError
+
+    def cancel(self):
+        self.token.cancel()
+
+    def expire(self):
+        self.timed_out = True
+        self.cancel()
+
+
+class OperationJob(Job):
+    """Runs the unlock or restore operation"""
+
+    def __init__(self, operation: str, timeout: Optional[float] = None):
+        super().__init__(timeout if timeout is not None else OPERATION_TIMEOUTS.get(operation))
+        self.name = operation
+        self.runner = OperationRunner(operation)
+        self.token = self.runner.token
+
+    def execute(self, emit: Callable[[object], None]) -> JobResult:
+        self.runner.log_callback = lambda message: emit(LogEvent(message))
+        self.runner.progress_callback = lambda percent: emit(ProgressEvent(percent))
+        success, message = self.runner.run()
+        return JobResult(self.name, success, message, summary=self.runner.summary, data=self.runner.cbs_findings)
+
+    def cancel(self):
+        self.runner.cancel()
+
+
+class RecoveryJob(Job):
+    """Rolls back an operation a crash left half-done; data is None if there was nothing to recover.
+
+    Like an unlock's final copy, a rollback always runs to completion, so it has no timeout.
+    """
+    name = "recover"
+
+    def execute(self, emit: Callable[[object], None]) -> JobResult:
+        result = recover_interrupted_operation(lambda message: emit(LogEvent(message)))
+        if result is None:
+            return JobResult(self.name, True, "Nothing to recover")
+        success, message = result
+        return JobResult(self.name, success, message, data=result)
+
+
+class VerifyPayloadJob(Job):
+    """Checks the bundled DLLs against the payload manifest; data is (problems, verified)"""
+    name = "verify"
+    timeout = VERIFY_TIMEOUT
+    runs_after_failure = True
+
+    def execute(self, emit: Callable[[object], None]) -> JobResult:
+        problems, verified = verify_payload(token=self.token)
+        message = "Required DLL files verified" if not problems else "Necessary files are missing or damaged"
+        return JobResult(self.name, not problems, message, data=(problems, verified))
+
+
+class TargetStateJob(Job):
+    """Classifies the installed target files; data is a list of TargetState"""
+    name = "target_states"
+    timeout = TARGET_STATE_TIMEOUT
+    runs_after_failure = True
+
+    def execute(self, emit: Callable[[object], None]) -> JobResult:
+        states = scan_target_states(token=self.token)
+        return JobResult(self.name, True, f"{len(states)} target files checked", data=states)
+
+
+class HistoryJob(Job):
+    """Brings the log history index up to date and queries it; data is (page of sessions, total matches)"""
+    name = "history"
+    timeout = HISTORY_TIMEOUT
+
+    def __init__(self, index: HistoryIndex, page: int = 0, refresh: bool = True, **filters):
+        super().__init__()
+        self.index = index
+        self.page = page
+        self.refresh = refresh
+        self.filters = filters
+
+    def execute(self, emit: Callable[[object], None]) -> JobResult:
+        if self.refresh:
+            self.index.refresh(self.token)
+        self.token.check()
+        entries, total = self.index.query(page=self.page, **self.filters)
+        return JobResult(self.name, True, f"{total} sessions", data=(entries, total))
+
+
+class SessionLinesJob(Job):
+    """Reads a page of one session's log lines; data is the list of lines"""
+    name = "session_lines"
+    timeout = HISTORY_TIMEOUT
+
+    def __init__(self, index: HistoryIndex, entry: SessionEntry, start: int, count: int = LINES_PAGE_SIZE):
+        super().__init__()
+        self.index = index
+        self.entry = entry
+        self.start = start
+        self.count = count
+
+    def execute(self, emit: Callable[[object], None]) -> JobResult:
+        lines = self.index.read_lines(self.entry, self.start, self.count, self.token)
+        return JobResult(self.name, True, f"{len(lines)} lines", data=lines)
+
+
+def run_job(job: Job, emit: Callable[[object], None]) -> JobResult:
+    """Run a job on the calling thread, enforcing its timeout and turning errors into a result"""
+    timer = None
+    if job.timeout:
+        timer = threading.Timer(job.timeout, job.expire)
+        timer.daemon = True
+        timer.start()
+
+    started = time.perf_counter()
+    try:
+        job.token.check()
+        result = job.execute(emit)
+    except OperationCancelled:
+        result = JobResult(job.name, False, "Operation cancelled")
+    except Exception as e:
+        logger.exception(f"Job {job.name} failed")
+        result = JobResult(job.name, False, str(e))
+    finally:
+        if timer:
+            timer.cancel()
+
+    if job.timed_out:
+        # Whatever a job produced before it expired is incomplete
+        result = result._replace(success=False, message=f"{job.name} timed out after {job.timeout:g} seconds",
+                                 data=None)
+    return result._replace(cancelled=job.token.cancelled, timed_out=job.timed_out,
+                           duration=time.perf_counter() - started)
+
+
+def run_chain(jobs: List[Job], on_event: Callable[[Job, object], None],
+              on_result: Callable[[Job, JobResult], None]) -> List[JobResult]:
+    """Run jobs one after another, e.g. verify, restore, verify again.
+
+    After a job fails, only the jobs marked runs_after_failure still run; the
+    others are reported with a skipped result naming the job that failed.
+    """
+    results = []
+    failed = None
+    for job in jobs:
+        if failed and not job.runs_after_failure:
+            result = JobResult(job.name, False, f"{job.name} skipped because {failed} failed", skipped=True)
+            logger.info(f"Job {job.name} skipped: {failed} failed")
+        else:
+            result = run_job(job, lambda event, job=job: on_event(job, event))
+            logger.info(f"Job {job.name} finished in {result.duration:.2f}s: {result.message}")
+            if not result.success and not failed:
+                failed = job.name
+        on_result(job, result)
+        results.append(result)
+    return results
@@ -0,0 +1,103 @@
+"""Write-ahead journal of the file-system steps of an operation, for recovery after a crash"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from paths import data_directory
+
+JOURNAL_NAME = "journal.jsonl"
+
+
+class JournalStep(NamedTuple):
+    """A file-system step that was about to change target"""
+    action: str
+    target: str
+    sha256: Optional[str]
+    backup: Optional[str]
+    done: bool
+
+
+class IncompleteOperation(NamedTuple):
+    """What the journal says about an operation that never committed"""
+    operation: str
+    started: float
+    steps: List[JournalStep]
+
+
+class Journal:
+    """Append-only record of what an operation is about to do to the system files.
+
+    Each step is written and fsynced before the file is touched, together with
+    the digest of the original the file should be rolled back to. A finished
+    operation deletes the journal, so one still present at startup belongs to
+    an operation that was interrupted. Records are only written between begin()
+    and commit().
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else data_directory() / JOURNAL_NAME
+        self.active = False
+
+    def begin(self, operation: str):
+        """Start a new journal, replacing whatever an earlier operation left behind"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            self._write(f, {"begin": operation, "time": time.time()})
+        self.active = True
+
+    def record(self, action: str, target: str, sha256: Optional[str], backup: Optional[str] = None):
+        """Record that action is about to change target, whose original has digest sha256"""
+        self._append({"action": action, "target": target, "sha256": sha256, "backup": backup})
+
+    def complete(self, target: str):
+        """Record that the last step recorded for target finished"""
+        self._append({"done": target})
+
+    def commit(self):
+        """The operation finished or was rolled back by itself; nothing to recover"""
+        self.active = False
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def load(self) -> Optional[IncompleteOperation]:
+        """The operation left in the journal, or None if the last one finished"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A torn last line from a power loss; everything before it was fsynced
+                break
+        if not records or "begin" not in records[0]:
+            return None
+
+        steps = []
+        for record in records[1:]:
+            if "done" in record:
+                steps = [s._replace(done=True) if s.target == record["done"] else s for s in steps]
+            elif "action" in record:
+                steps.append(JournalStep(record["action"], record["target"], record.get("sha256"),
+                                         record.get("backup"), False))
+        return IncompleteOperation(records[0]["begin"], records[0].get("time", 0.0), steps)
+
+    def _append(self, record: dict):
+        if not self.active:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            self._write(f, record)
+
+    @staticmethod
+    def _write(f, record: dict):
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
@@ -1,36 +1,67 @@
 # -*- mode: python ; coding: utf-8 -*-
+import importlib.machinery
+import os
+import sys
+
+sys.path.insert(0, SPECPATH)
+from integrity import MANIFEST_NAME, write_manifest
+
+datas = [
+    ('dll', 'dll'),
+    ('assets', 'assets'),
+]
+# Record SHA-256 digests and sizes of the bundled payload for the startup integrity check
+write_manifest(os.path.join(SPECPATH, MANIFEST_NAME), SPECPATH, datas)
+datas.append((MANIFEST_NAME, '.'))
+
+# The default profile is tuned for start-up time: a folder layout that starts without
+# unpacking anything, and no UPX at all, since every compressed DLL and .pyd would have to
+# be decompressed on every launch. Set BEDROCK_UNLOCKER_ONEFILE=1 for the old single
+# executable, which keeps UPX for everything except the Qt binaries.
+onefile = os.environ.get('BEDROCK_UNLOCKER_ONEFILE') == '1'
+
+# Only QtCore, QtGui and QtWidgets are used
+qt_excludes = [
+    'PyQt5.' + module for module in (
+        'QtBluetooth', 'QtDBus', 'QtDesigner', 'QtHelp', 'QtLocation', 'QtMultimedia',
+        'QtMultimediaWidgets', 'QtNetwork', 'QtNfc', 'QtOpenGL', 'QtPositioning',
+        'QtPrintSupport', 'QtQml', 'QtQuick', 'QtQuick3D', 'QtQuickWidgets',
+        'QtRemoteObjects', 'QtSensors', 'QtSerialPort', 'QtSql', 'QtSvg', 'QtTest',
+        'QtTextToSpeech', 'QtWebChannel', 'QtWebSockets', 'QtWinExtras', 'QtXml',
+        'QtXmlPatterns',
+    )
+]
+upx_exclude = [
+    'Qt5Core.dll', 'Qt5Gui.dll', 'Qt5Widgets.dll', 'qwindows.dll', 'qwindowsvistastyle.dll',
+    'libEGL.dll', 'libGLESv2.dll', 'opengl32sw.dll', 'd3dcompiler_47.dll',
+    'vcruntime140.dll', 'vcruntime140_1.dll', 'msvcp140.dll', 'python3.dll',
+    # The PyQt5 extension modules; sip's name carries the ABI tag of the building Python
+    'QtCore.pyd', 'QtGui.pyd', 'QtWidgets.pyd', 'sip' + importlib.machinery.EXTENSION_SUFFIXES[0],
+]
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[
-        ('dll', 'dll'),
-        ('assets', 'assets'),
-    ],
+    datas=datas,
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=qt_excludes + ['tkinter', 'unittest', 'pydoc', 'pydoc_data'],
     noarchive=False,
-    optimize=0,
+    optimize=2,
 )
 
 pyz = PYZ(a.pure)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
+exe_options = dict(
     name='MCBedrockUnlocker',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
+    upx=onefile,
+    upx_exclude=upx_exclude,
     runtime_tmpdir=None,
     console=False,
     disable_windowed_traceback=False,
@@ -41,4 +72,17 @@ exe = EXE(
     icon=['exe_assets\\exe_icon.ico'],
     uac_admin=True,
     manifest='exe_assets\\manifest.xml',
-)
\ No newline at end of file
+)
+
+if onefile:
+    exe = EXE(pyz, a.scripts, a.binaries, a.datas, [], **exe_options)
+else:
+    exe = EXE(pyz, a.scripts, [], exclude_binaries=True, **exe_options)
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=False,
+        name='MCBedrockUnlocker',
+    )
@@ -0,0 +1,47 @@
+"""Well-known locations used by the application"""
+import os
+import sys
+from pathlib import Path
+
+APP_DIR_NAME = "MCBedrockUnlocker"
+
+
+def resource_path(relative_path):
+    """ Get absolute path to resource, works for dev and for PyInstaller """
+    try:
+        base_path = sys._MEIPASS
+    except AttributeError:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, relative_path)
+
+
+def app_directory() -> Path:
+    """Directory containing the executable (or main.py when run from source)"""
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).resolve().parent
+    return Path(__file__).resolve().parent
+
+
+def log_directory() -> Path:
+    """Fixed location of the logs folder, independent of the working directory.
+
+    Can be moved with the BEDROCK_UNLOCKER_LOG_DIR environment variable.
+    """
+    override = os.environ.get("BEDROCK_UNLOCKER_LOG_DIR")
+    if override:
+        return Path(override)
+    return app_directory() / "logs"
+
+
+def data_directory() -> Path:
+    """Machine-wide directory for caches and backups.
+
+    Defaults to %ProgramData%\\MCBedrockUnlocker on Windows and can be moved with
+    the BEDROCK_UNLOCKER_DATA_DIR environment variable.
+    """
+    override = os.environ.get("BEDROCK_UNLOCKER_DATA_DIR")
+    if override:
+        return Path(override)
+    if os.environ.get("ProgramData"):
+        return Path(os.environ["ProgramData"]) / APP_DIR_NAME
+    return Path.home() / ".local" / "share" / APP_DIR_NAME
@@ -0,0 +1,40 @@
+"""Swappable layer for starting the Windows tools the operations depend on"""
+import os
+import subprocess
+from typing import Dict, List, Optional
+
+from cancellation import process_group_kwargs
+
+
+class ProcessRunner:
+    """Starts takeown, icacls, sfc and DISM, optionally substituting other commands.
+
+    tools maps a tool name to the command prefix used in its place, e.g.
+    {"sfc": [sys.executable, "fake_sfc.py"]}, so the operations can be exercised
+    and timed on machines without the real executables.
+    """
+
+    def __init__(self, tools: Optional[Dict[str, List[str]]] = None):
+        self.tools = tools or {}
+
+    def command(self, tool: str, args: List[str]) -> List[str]:
+        return [*self.tools.get(tool, [tool]), *args]
+
+    def run(self, tool: str, args: List[str]) -> subprocess.CompletedProcess:
+        """Run a short command to completion, capturing its output as text"""
+        kwargs = {"creationflags": subprocess.CREATE_NO_WINDOW} if os.name == "nt" else {}
+        return subprocess.run(
+            self.command(tool, args),
+            capture_output=True,
+            text=True,
+            **kwargs
+        )
+
+    def start(self, tool: str, args: List[str]) -> subprocess.Popen:
+        """Start a long-running command in its own process group, its output readable as bytes"""
+        return subprocess.Popen(
+            self.command(tool, args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            **process_group_kwargs()
+        )
@@ -0,0 +1,104 @@
+"""Escalating repair pipeline used by the restore operation, cheapest step first"""
+from typing import List, Optional
+
+
+class RepairStep:
+    """One way of getting the original files back.
+
+    repair() receives the targets that are still not fixed and returns those it
+    could not fix either. The runner is the OperationRunner doing the restore,
+    which provides logging, tracing, cancellation and the tool wrappers.
+    """
+    name = ""
+    description = ""
+    outcome = ""
+    uses_sfc = False
+    # Tools the step cannot run without; the step is skipped if one is missing
+    tools = ()
+
+    def repair(self, runner, targets: List[str]) -> List[str]:
+        raise NotImplementedError
+
+
+class BackupRestoreStep(RepairStep):
+    name = "restore_backup"
+    description = "Restoring original files from backup..."
+    outcome = "restored from backup"
+
+    def repair(self, runner, targets: List[str]) -> List[str]:
+        remaining = []
+        for target in targets:
+            runner.token.check()
+            if not runner.restore_from_backup(target):
+                remaining.append(target)
+        return remaining
+
+
+class ScanFileStep(RepairStep):
+    name = "scanfile"
+    description = "Checking remaining files with system file checker..."
+    outcome = "restored by system file checker"
+    uses_sfc = True
+    tools = ("sfc",)
+
+    def repair(self, runner, targets: List[str]) -> List[str]:
+        return [t for t in targets if not runner.scan_file(t)]
+
+
+class DismRestoreHealthStep(RepairStep):
+    name = "restore_health"
+    description = "Repairing the component store with DISM, this may take a while..."
+    outcome = "restored after repairing the component store"
+    uses_sfc = True
+    tools = ("dism", "sfc")
+
+    def repair(self, runner, targets: List[str]) -> List[str]:
+        if not runner.restore_health():
+            return targets
+        # DISM only repairs the store sfc copies from; the files themselves still need sfc
+        return [t for t in targets if not runner.scan_file(t)]
+
+
+class FullScanStep(RepairStep):
+    name = "scannow"
+    description = "Falling back to a full system scan, this may take a while..."
+    outcome = "restored by a full system scan"
+    uses_sfc = True
+    tools = ("sfc",)
+
+    def repair(self, runner, targets: List[str]) -> List[str]:
+        success, message = runner.full_scan_operation()
+        runner.log(message)
+        return [] if success else targets
+
+
+def default_steps() -> List[RepairStep]:
+    return [BackupRestoreStep(), ScanFileStep(), DismRestoreHealthStep(), FullScanStep()]
+
+
+class RepairPipeline:
+    """Runs repair steps in order, each only on the targets the previous ones left unfixed"""
+
+    def __init__(self, steps: Optional[List[RepairStep]] = None):
+        self.steps = steps if steps is not None else default_steps()
+        self.last_step = None
+        self.sfc_targets = []
+
+    def run(self, runner, targets: List[str]) -> List[str]:
+        """Returns the targets no step could fix"""
+        remaining = list(targets)
+        for step in self.steps:
+            if not remaining:
+                break
+            runner.token.check()
+            missing = [tool for tool in step.tools if not runner.tool_available(tool)]
+            if missing:
+                runner.log(f"{', '.join(missing)} not available on this system -- skipping {step.name}")
+                continue
+            runner.log(step.description)
+            if step.uses_sfc:
+                self.sfc_targets.extend(t for t in remaining if t not in self.sfc_targets)
+            with runner.tracer.span(step.name):
+                remaining = step.repair(runner, remaining)
+            self.last_step = step
+        return remaining
@@ -0,0 +1,100 @@
+"""Time-to-first-paint measurement for the GUI.
+
+Run as a script to launch the application repeatedly and report how long each
+launch took to paint its window:
+
+    python startup_timing.py --runs 10
+    python startup_timing.py --runs 10 dist/MCBedrockUnlocker/MCBedrockUnlocker.exe
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+MEASURE_FLAG = "--measure-startup"
+
+
+def process_start_time() -> Optional[float]:
+    """Creation time of this process as a Unix timestamp, if the OS reports it"""
+    try:
+        if os.name == "nt":
+            import ctypes
+            from ctypes import wintypes
+            creation, exit_time, kernel, user = (wintypes.FILETIME() for _ in range(4))
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.kernel32.GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exit_time),
+                                                          ctypes.byref(kernel), ctypes.byref(user)):
+                return None
+            # FILETIME counts 100 ns intervals since 1601-01-01
+            ticks = (creation.dwHighDateTime << 32) | creation.dwLowDateTime
+            return (ticks - 116444736000000000) / 1e7
+        # Linux: start time in clock ticks since boot, compared against the boot clock
+        with open("/proc/self/stat", "r") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        age = time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")
+        return time.time() - age
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class StartupTimer:
+    """Named points during startup, reported in milliseconds since the process was created"""
+
+    def __init__(self):
+        self.origin = process_start_time() or time.time()
+        self.marks = {}
+
+    def mark(self, name: str):
+        self.marks[name] = time.time()
+
+    def report(self) -> Dict:
+        return {
+            "process_started": self.origin,
+            "marks": self.marks,
+            "milliseconds": {name: round((t - self.origin) * 1000, 1) for name, t in self.marks.items()},
+        }
+
+
+TIMER = StartupTimer()
+
+
+def launch_once(command: List[str], output: str) -> float:
+    """Launch command with --measure-startup once; time from launch to first paint, in ms"""
+    launched = time.time()
+    subprocess.run([*command, "--output", output, "gui", MEASURE_FLAG], check=True)
+    with open(output, "r", encoding="utf-8") as f:
+        result = json.load(f)
+    return (result["marks"]["first_paint"] - launched) * 1000
+
+
+def measure(command: List[str], runs: int) -> Dict:
+    """Launch command with --measure-startup runs times; time from launch to first paint, in ms"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output = os.path.join(temp_dir, "startup.json")
+        samples = [launch_once(command, output) for _ in range(runs)]
+
+    return {
+        "command": command,
+        "runs": runs,
+        "first_paint_ms": {
+            "median": round(statistics.median(samples), 1),
+            "min": round(min(samples), 1),
+            "max": round(max(samples), 1),
+        },
+        "samples_ms": [round(sample, 1) for sample in samples],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure time to first paint of the GUI")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("command", nargs="*",
+                        help="application to launch (default: main.py with this interpreter)")
+    args = parser.parse_args()
+    command = args.command or [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")]
+    print(json.dumps(measure(command, args.runs), indent=2))
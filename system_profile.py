@@ -0,0 +1,162 @@
+"""Facts about the machine, probed once at startup and shared by the UI, the CLI and the worker"""
+import logging
+import os
+import platform
+import shutil
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional
+
+# Registry locations Windows uses to flag a restart that servicing is waiting for
+_REBOOT_PENDING_KEYS = [
+    r"SOFTWARE\Microsoft\Windows\CurrentVersion\Component Based Servicing\RebootPending",
+    r"SOFTWARE\Microsoft\Windows\CurrentVersion\WindowsUpdate\Auto Update\RebootRequired",
+]
+
+logger = logging.getLogger(__name__)
+
+_profile = None
+_probe_thread = None
+_lock = threading.Lock()
+
+
+class SystemProfile(NamedTuple):
+    """Everything the operations need to know about the machine; fixed for the life of the process"""
+    architecture: str
+    is_64bit: bool
+    os_name: str
+    os_build: str
+    admin: bool
+    system_root: str
+    reboot_pending: bool
+    sfc_available: bool
+    dism_available: bool
+    probe_times: Dict[str, float]
+
+    def as_dict(self) -> Dict:
+        return {name: value for name, value in self._asdict().items() if name != "probe_times"}
+
+
+def _probe_architecture():
+    machine = platform.machine()
+    # A 32-bit process on 64-bit Windows sees the real architecture in PROCESSOR_ARCHITEW6432
+    is_64bit = (machine.endswith("64") or os.environ.get("PROCESSOR_ARCHITECTURE", "").endswith("64")
+                or os.environ.get("PROCESSOR_ARCHITEW6432", "").endswith("64"))
+    if machine.endswith("64"):
+        architecture = "64-bit"
+    elif machine.endswith("86"):
+        architecture = "32-bit"
+    else:
+        architecture = machine
+    return architecture, is_64bit
+
+
+def _probe_admin() -> bool:
+    try:
+        import ctypes
+        return ctypes.windll.shell32.IsUserAnAdmin() != 0
+    except Exception:
+        return False
+
+
+def _probe_reboot_pending() -> bool:
+    try:
+        import winreg
+    except ImportError:
+        return False
+    for key_path in _REBOOT_PENDING_KEYS:
+        try:
+            winreg.CloseKey(winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path))
+            return True
+        except OSError:
+            pass
+    try:
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SYSTEM\CurrentControlSet\Control\Session Manager") as key:
+            value, _ = winreg.QueryValueEx(key, "PendingFileRenameOperations")
+            return bool(value)
+    except OSError:
+        return False
+
+
+def _probe_system_root() -> str:
+    # Set by Windows for every process; guessing C:\Windows elsewhere would make every target path relative
+    system_root = os.environ.get("SystemRoot") or os.environ.get("windir")
+    if not system_root:
+        raise RuntimeError("SystemRoot is not set, so the Windows folder cannot be located")
+    return system_root
+
+
+def probe_system() -> SystemProfile:
+    """Run every probe, timing and logging each one"""
+    probe_times = {}
+
+    def timed(name: str, probe: Callable):
+        started = time.perf_counter()
+        value = probe()
+        probe_times[name] = time.perf_counter() - started
+        logger.info(f"System probe {name}: {value} ({probe_times[name] * 1000:.1f} ms)")
+        return value
+
+    architecture, is_64bit = timed("architecture", _probe_architecture)
+    os_name = timed("os", lambda: f"{platform.system()} {platform.release()}")
+    os_build = timed("os_build", platform.version)
+    admin = timed("admin", _probe_admin)
+    system_root = timed("system_root", _probe_system_root)
+    reboot_pending = timed("reboot_pending", _probe_reboot_pending)
+    sfc_available = timed("sfc", lambda: shutil.which("sfc") is not None)
+    dism_available = timed("dism", lambda: shutil.which("dism") is not None)
+    return SystemProfile(architecture, is_64bit, os_name, os_build, admin, system_root,
+                         reboot_pending, sfc_available, dism_available, probe_times)
+
+
+def _probe_once():
+    global _profile
+    started = time.perf_counter()
+    try:
+        profile = probe_system()
+    except Exception:
+        # system_profile() probes again on the calling thread, which then gets the error itself
+        logger.exception("System probe failed")
+        return
+    _profile = profile
+    logger.info(f"System profile ready in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+def start_probe():
+    """Probe the system on a background thread, unless that has already started"""
+    global _probe_thread
+    with _lock:
+        if _probe_thread is None:
+            _probe_thread = threading.Thread(target=_probe_once, name="system-probe", daemon=True)
+            _probe_thread.start()
+
+
+def system_profile(timeout: Optional[float] = None) -> SystemProfile:
+    """The profile probed at startup, waiting for the probe to finish if it is still running.
+
+    If the background probe failed, the probe is repeated here so its exception
+    reaches the caller; a later call tries again.
+    """
+    global _profile
+    if _profile is None:
+        start_probe()
+        _probe_thread.join(timeout)
+    if _profile is None:
+        if _probe_thread.is_alive():
+            raise TimeoutError("System probe did not finish")
+        with _lock:
+            if _profile is None:
+                _profile = probe_system()
+    return _profile
+
+
+def reset_profile():
+    """Forget the probed profile so the next system_profile() probes again, e.g. after SystemRoot was redirected"""
+    global _profile, _probe_thread
+    with _lock:
+        thread = _probe_thread
+    if thread is not None:
+        thread.join()
+    with _lock:
+        _profile = None
+        _probe_thread = None
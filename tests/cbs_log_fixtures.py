@@ -0,0 +1,54 @@
+"""Generator for synthetic CBS.log files in the format sfc writes them"""
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+DLL_NAME = "Windows.ApplicationModel.Store.dll"
+SYSTEM_ROOT = r"C:\Windows"
+COMPONENT = "Microsoft-Windows-AppModel-Store, version 10.0.19041.1, arch {arch}, nonSxS"
+
+
+def target_path(folder: str) -> str:
+    return rf"{SYSTEM_ROOT}\{folder}\{DLL_NAME}"
+
+
+def cbs_line(when: datetime, text: str, source: str = "CSI") -> str:
+    return f"{when:%Y-%m-%d %H:%M:%S}, Info                  {source:<7}{text}"
+
+
+def filler(start: datetime, count: int) -> List[str]:
+    """Unrelated servicing lines, some continued on lines without a timestamp"""
+    lines = []
+    for i in range(count):
+        when = start + timedelta(seconds=i)
+        lines.append(cbs_line(when, f"{i:08x} [SR] Verifying 100 components"))
+        if i % 7 == 0:
+            lines.append(cbs_line(when, "Loaded Servicing Stack v10.0.19041.3025 with Core", source="CBS"))
+            lines.append("    from C:\\Windows\\WinSxS\\amd64_microsoft-windows-servicingstack\\cbscore.dll")
+    return lines
+
+
+def repaired(when: datetime, folder: str) -> List[str]:
+    return [
+        cbs_line(when, f"00000a01 [SR] Repairing corrupted file \\??\\{target_path(folder)} from store"),
+        cbs_line(when, "00000a02 [SR] Repair complete"),
+    ]
+
+
+def not_repaired(when: datetime, arch: str) -> List[str]:
+    """An unrepairable file, identified only by its component's architecture as CBS does"""
+    return [
+        cbs_line(when, f'00000b01 Hashes for file member [l:34]"{DLL_NAME.lower()}" do not match.'),
+        cbs_line(when, f'00000b02 [SR] Cannot repair member file [l:34]"{DLL_NAME}" of '
+                       f'{COMPONENT.format(arch=arch)} in the store, hash mismatch'),
+    ]
+
+
+def repaired_by_component(when: datetime, arch: str) -> List[str]:
+    return [cbs_line(when, f'00000c01 [SR] Repairing corrupted file [l:34]"{DLL_NAME}" of '
+                           f'{COMPONENT.format(arch=arch)} from store')]
+
+
+def write_cbs_log(path: Path, lines: List[str]) -> Path:
+    path.write_bytes(("\r\n".join(lines) + "\r\n").encode("utf-8"))
+    return path
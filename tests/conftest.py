@@ -0,0 +1,70 @@
+"""Shared test setup: the application modules live at the top level of the repository"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmarks", action="store_true",
+                     help="also run the benchmarks in test_benchmarks.py (slow, writes 64 MB dummy files)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmarks: timing runs of benchmark.py, only run with --benchmarks")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmarks"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmarks")
+    for item in items:
+        if "benchmarks" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def fixtures_dir() -> Path:
+    return FIXTURES
+
+
+@pytest.fixture
+def system():
+    """A fresh temporary SystemRoot with fake tools for one test; see benchmark.VirtualSystem"""
+    from benchmark import VirtualSystem
+
+    with VirtualSystem() as virtual:
+        yield virtual
+
+
+@pytest.fixture(scope="session")
+def virtual_system():
+    """One temporary SystemRoot with fake tools, shared by the benchmarks; see benchmark.VirtualSystem"""
+    import contextlib
+    import logging
+    from app_logging import setup_logging, shutdown_logging
+    from benchmark import VirtualSystem
+
+    # setup_logging replaces the root handlers, pytest's capture handlers included
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    with VirtualSystem() as system:
+        # Log to the temporary directory only, as benchmark.py does
+        with contextlib.redirect_stderr(None):
+            setup_logging()
+        try:
+            yield system
+        finally:
+            shutdown_logging()
+            for handler in root.handlers[:]:
+                root.removeHandler(handler)
+            for handler in saved_handlers:
+                root.addHandler(handler)
+            root.setLevel(saved_level)
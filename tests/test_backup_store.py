@@ -0,0 +1,69 @@
+"""BackupStore generations, deduplication, pruning and restore"""
+import pytest
+
+from backup_store import BackupStore
+from integrity import hash_file
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BackupStore(tmp_path / "backups", keep_generations=2)
+
+
+def write(path, content: bytes):
+    path.write_bytes(content)
+    return path
+
+
+def test_generations_newest_first(store, tmp_path):
+    target = tmp_path / "target.dll"
+    first = store.add(write(target, b"MZ build 1"))
+    second = store.add(write(target, b"MZ build 2"))
+    assert [e.sha256 for e in store.generations(target)] == [second.sha256, first.sha256]
+    assert store.latest(target) == second
+    # The index survives a reload
+    assert BackupStore(store.root).generations(target) == store.generations(target)
+
+
+def test_identical_content_is_stored_once(store, tmp_path):
+    one, two = write(tmp_path / "one.dll", b"MZ same"), write(tmp_path / "two.dll", b"MZ same")
+    store.add(one)
+    store.add(one)
+    store.add(two)
+    assert len(store.generations(one)) == 1
+    assert [p.name for p in store.objects_dir.iterdir()] == [hash_file(one)]
+
+
+def test_pruning_deletes_unreferenced_objects(store, tmp_path):
+    target, other = tmp_path / "target.dll", tmp_path / "other.dll"
+    oldest = store.add(write(target, b"MZ build 1"))
+    # Still referenced through another target after it is pruned from this one
+    shared = store.add(write(target, b"MZ build 2"))
+    store.add(write(other, b"MZ build 2"))
+    newest = store.add(write(target, b"MZ build 3"))
+    store.add(write(target, b"MZ build 4"))
+
+    assert [e.sha256 for e in store.generations(target)][1] == newest.sha256
+    assert len(store.generations(target)) == 2
+    assert not store.object_path(oldest.sha256).exists()
+    assert store.object_path(shared.sha256).exists()
+    assert not list(store.root.glob("*.tmp"))
+
+
+def test_restore_swaps_the_backup_in(store, tmp_path):
+    target = write(tmp_path / "target.dll", b"MZ original")
+    entry = store.add(target)
+    write(target, b"MZ unlocked")
+    store.restore(target, entry)
+    assert target.read_bytes() == b"MZ original"
+    assert not (tmp_path / "target.dll.restore").exists()
+
+
+def test_restore_refuses_a_corrupted_object(store, tmp_path):
+    target = write(tmp_path / "target.dll", b"MZ original")
+    entry = store.add(target)
+    write(store.object_path(entry.sha256), b"MZ damaged!")
+    write(target, b"MZ unlocked")
+    with pytest.raises(IOError):
+        store.restore(target, entry)
+    assert target.read_bytes() == b"MZ unlocked"
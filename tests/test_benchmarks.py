@@ -0,0 +1,37 @@
+"""The benchmark.py suite under pytest-benchmark, against one shared temporary SystemRoot.
+
+    python -m pytest tests/test_benchmarks.py --benchmarks --benchmark-autosave
+    python -m pytest tests/test_benchmarks.py --benchmarks --benchmark-compare --benchmark-compare-fail=median:25%
+"""
+import pytest
+
+import benchmark as suite
+
+pytest.importorskip("pytest_benchmark")
+
+ROUNDS = suite.DEFAULT_ROUNDS
+
+pytestmark = pytest.mark.benchmarks
+
+
+def pytest_measure(benchmark):
+    """A replacement for suite.measure that times each round through the benchmark fixture"""
+    def measure(function, rounds, setup=None):
+        if benchmark.disabled:
+            # With --benchmark-disable the fixture only calls function once
+            return suite.measure(lambda: benchmark(function), 1, setup)
+        details = {}
+        benchmark.pedantic(lambda: details.update(function() or {}), setup=setup, rounds=rounds, iterations=1)
+        stats = benchmark.stats.stats
+        details["min_seconds"] = round(stats.min, 6)
+        details["max_seconds"] = round(stats.max, 6)
+        return stats.median, details
+    return measure
+
+
+@pytest.mark.parametrize("bench", suite.BENCHMARKS, ids=lambda bench: bench.__name__[len("bench_"):])
+def test_benchmark(benchmark, virtual_system, bench):
+    result = bench(virtual_system, ROUNDS, pytest_measure(benchmark))
+    if result.skipped:
+        pytest.skip(result.skipped)
+    benchmark.extra_info.update(result.details)
@@ -0,0 +1,85 @@
+"""analyze_cbs_log and find_session_offset against generated CBS.log files"""
+import mmap
+from datetime import datetime, timedelta
+
+import pytest
+
+from cbs_log import NOT_REPAIRED, NOT_TOUCHED, REPAIRED, analyze_cbs_log, find_session_offset
+from cbs_log_fixtures import (cbs_line, filler, not_repaired, repaired, repaired_by_component, target_path,
+                              write_cbs_log)
+
+EARLIER = datetime(2024, 5, 1, 9, 0, 0)
+SESSION = datetime(2024, 5, 1, 10, 0, 0)
+BOTH_TARGETS = [target_path("System32"), target_path("SysWOW64")]
+
+
+def session_offset(path, since):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return find_session_offset(mapped, since)
+
+
+@pytest.fixture
+def two_sessions(tmp_path):
+    """An earlier session of 300 lines and a later one, with untimestamped lines on both sides of the start"""
+    earlier = filler(EARLIER, 300)
+    earlier += ["    continuation without a timestamp"] * 50
+    later = [cbs_line(SESSION, "00000001 Starting TrustedInstaller initialization.", source="CBS")]
+    later.append("    continuation without a timestamp")
+    later += filler(SESSION + timedelta(seconds=1), 300)
+    path = write_cbs_log(tmp_path / "CBS.log", earlier + later)
+    first_later = len("".join(line + "\r\n" for line in earlier).encode("utf-8"))
+    return path, first_later
+
+
+def test_session_offset_skips_lines_without_timestamp(two_sessions):
+    path, first_later = two_sessions
+    assert session_offset(path, SESSION) == first_later
+    assert session_offset(path, SESSION - timedelta(seconds=1)) == first_later
+
+
+def test_session_offset_outside_the_log(two_sessions):
+    path, _ = two_sessions
+    assert session_offset(path, EARLIER - timedelta(days=1)) == 0
+    assert session_offset(path, SESSION + timedelta(days=1)) == path.stat().st_size
+
+
+def test_session_offset_inside_a_session(two_sessions):
+    path, first_later = two_sessions
+    offset = session_offset(path, EARLIER + timedelta(seconds=100))
+    assert 0 < offset < first_later
+    assert path.read_bytes()[offset:offset + 19] == b"2024-05-01 09:01:40"
+
+
+def test_all_three_outcomes(tmp_path):
+    lines = filler(SESSION, 50) + repaired(SESSION + timedelta(minutes=1), "System32")
+    lines += filler(SESSION + timedelta(minutes=2), 50) + not_repaired(SESSION + timedelta(minutes=3), "wow64")
+    path = write_cbs_log(tmp_path / "CBS.log", lines)
+
+    outcomes = {f.path: f.outcome for f in analyze_cbs_log(str(path), BOTH_TARGETS)}
+    assert outcomes == {target_path("System32"): REPAIRED, target_path("SysWOW64"): NOT_REPAIRED}
+
+    single = analyze_cbs_log(str(write_cbs_log(tmp_path / "quiet.log", filler(SESSION, 50))),
+                             [target_path("System32")])
+    assert [(f.outcome, f.lines) for f in single] == [(NOT_TOUCHED, [])]
+
+
+@pytest.mark.parametrize("arch, folder", [("wow64", "SysWOW64"), ("amd64", "System32")])
+def test_architecture_attribution(tmp_path, arch, folder):
+    # Lines naming the component instead of a path are attributed by architecture
+    path = write_cbs_log(tmp_path / "CBS.log", filler(SESSION, 20) + repaired_by_component(SESSION, arch))
+    findings = {f.path: f for f in analyze_cbs_log(str(path), BOTH_TARGETS)}
+    other = target_path("System32" if folder == "SysWOW64" else "SysWOW64")
+    assert findings[target_path(folder)].outcome == REPAIRED
+    assert f"arch {arch}" in findings[target_path(folder)].lines[0]
+    assert findings[other].outcome == NOT_TOUCHED
+
+
+def test_earlier_sessions_are_ignored(tmp_path):
+    lines = filler(EARLIER, 20) + not_repaired(EARLIER + timedelta(minutes=1), "amd64")
+    lines += filler(SESSION, 20) + repaired(SESSION + timedelta(minutes=1), "SysWOW64")
+    path = write_cbs_log(tmp_path / "CBS.log", lines)
+
+    outcomes = {f.path: f.outcome for f in analyze_cbs_log(str(path), BOTH_TARGETS, SESSION)}
+    assert outcomes == {target_path("System32"): NOT_TOUCHED, target_path("SysWOW64"): REPAIRED}
+    outcomes = {f.path: f.outcome for f in analyze_cbs_log(str(path), BOTH_TARGETS)}
+    assert outcomes[target_path("System32")] == NOT_REPAIRED
@@ -0,0 +1,38 @@
+"""Filtering the session history"""
+from app_logging import OUTCOME_FAILED, OUTCOME_SUCCESS
+from history import OUTCOME_NONE, HistoryIndex, SessionEntry
+
+
+def index_of(tmp_path, *operations):
+    index = HistoryIndex(tmp_path)
+    index.entries = [SessionEntry(f"{number:x}", None, None, [list(op) for op in ops], 1, [])
+                     for number, ops in enumerate(operations)]
+    return index
+
+
+def sessions(index, **filters):
+    entries, total = index.query(**filters)
+    assert total == len(entries)
+    return [entry.session for entry in entries]
+
+
+def test_outcome_matches_any_operation(tmp_path):
+    index = index_of(
+        tmp_path,
+        [("restore", OUTCOME_FAILED), ("restore", OUTCOME_SUCCESS)],
+        [("unlock", OUTCOME_SUCCESS)],
+        [],
+    )
+    assert sessions(index, outcome=OUTCOME_FAILED) == ["0"]
+    assert sessions(index, outcome=OUTCOME_SUCCESS) == ["0", "1"]
+    assert sessions(index, outcome=OUTCOME_NONE) == ["2"]
+
+
+def test_operation_and_outcome_match_the_same_operation(tmp_path):
+    index = index_of(
+        tmp_path,
+        [("unlock", OUTCOME_FAILED), ("restore", OUTCOME_SUCCESS)],
+        [("restore", OUTCOME_FAILED)],
+    )
+    assert sessions(index, operation="restore", outcome=OUTCOME_FAILED) == ["1"]
+    assert sessions(index, operation="restore") == ["0", "1"]
@@ -0,0 +1,28 @@
+"""HashCache persistence"""
+import json
+
+from integrity import HashCache
+
+
+def test_cache_hits_and_prunes_missing_files(tmp_path):
+    cache_path = tmp_path / "hash_cache.json"
+    kept, removed = tmp_path / "kept.dll", tmp_path / "removed.dll"
+    kept.write_bytes(b"kept")
+    removed.write_bytes(b"removed")
+
+    cache = HashCache(cache_path)
+    digest = cache.sha256(kept)
+    cache.sha256(removed)
+    cache.save()
+    assert len(json.loads(cache_path.read_text())) == 2
+
+    # Like the unpack directory of a previous onefile launch
+    removed.unlink()
+    cache = HashCache(cache_path)
+    assert cache.sha256(kept) == digest
+    assert not cache.changed
+    other = tmp_path / "other.dll"
+    other.write_bytes(b"other")
+    cache.sha256(other)
+    cache.save()
+    assert sorted(json.loads(cache_path.read_text())) == sorted([str(kept), str(other)])
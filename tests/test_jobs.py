@@ -0,0 +1,62 @@
+"""Job timeouts and chains, outside the GUI"""
+import functools
+import time
+
+import core
+import integrity
+import jobs
+from jobs import Job, JobResult, TargetStateJob, VerifyPayloadJob, run_chain, run_job
+
+
+class FixedJob(Job):
+    def __init__(self, name, success):
+        super().__init__()
+        self.name = name
+        self.success = success
+
+    def execute(self, emit):
+        return JobResult(self.name, self.success, self.name)
+
+
+def slow_hashes(monkeypatch, delay):
+    sha256 = integrity.HashCache.sha256
+
+    def slow(self, path):
+        time.sleep(delay)
+        return sha256(self, path)
+
+    monkeypatch.setattr(integrity.HashCache, "sha256", slow)
+
+
+def test_timed_out_verify_stops_and_has_no_data(system, monkeypatch):
+    monkeypatch.setattr(jobs, "verify_payload", functools.partial(core.verify_payload, str(system.payload_manifest())))
+    slow_hashes(monkeypatch, 0.5)
+
+    result = run_job(VerifyPayloadJob(timeout=0.1), lambda event: None)
+    assert result.timed_out and not result.success
+    assert result.data is None
+    # Stopped after the first file instead of hashing every one
+    assert result.duration < 0.9
+
+
+def test_timed_out_target_scan_has_no_data(system, monkeypatch):
+    slow_hashes(monkeypatch, 0.5)
+
+    result = run_job(TargetStateJob(timeout=0.1), lambda event: None)
+    assert result.timed_out and not result.success
+    assert result.data is None
+    assert result.duration < 0.9
+
+
+def test_chain_reports_skipped_jobs(system):
+    jobs = [FixedJob("verify", False), FixedJob("unlock", True), TargetStateJob()]
+    reported = []
+
+    results = run_chain(jobs, lambda job, event: None, lambda job, result: reported.append(result))
+    assert reported == results
+    assert [(r.name, r.success, r.skipped) for r in results] == [
+        ("verify", False, False),
+        ("unlock", False, True),
+        ("target_states", True, False),
+    ]
+    assert results[1].message == "unlock skipped because verify failed"
@@ -0,0 +1,88 @@
+"""Rolling back an unlock interrupted by a crash or a failed cancellation"""
+import os
+
+import core
+from journal import Journal
+
+
+def targets(system):
+    return {folder: system.system_root / folder / core.DLL_NAME for folder in ("System32", "SysWOW64")}
+
+
+def recover(system):
+    log = []
+    runner = core.OperationRunner("recover", log.append, processes=system.processes())
+    success, message = runner.run()
+    return success, message, log
+
+
+def test_crash_after_delete(system):
+    originals = {folder: path.read_bytes() for folder, path in targets(system).items()}
+    runner = core.OperationRunner("unlock", processes=system.processes())
+    runner.journal.begin("unlock")
+    target = str(targets(system)["System32"])
+    assert runner.process_dll_file(target, "System32")
+    # The process dies here, before the custom DLL is copied or the journal committed
+    assert not os.path.exists(target)
+
+    success, message, _ = recover(system)
+    assert success, message
+    assert {folder: path.read_bytes() for folder, path in targets(system).items()} == originals
+    assert Journal().load() is None
+
+
+def test_crash_during_copy(system):
+    runner = core.OperationRunner("unlock", processes=system.processes())
+    runner.journal.begin("unlock")
+    for folder, target in targets(system).items():
+        assert runner.process_dll_file(str(target), folder)
+    # The copy onto System32 was recorded and half-written when the power went
+    target = targets(system)["System32"]
+    runner.journal.record("copy", str(target), runner.original_digest(str(target), "System32"))
+    target.write_bytes(b"MZ custom, torn")
+
+    success, message, _ = recover(system)
+    assert success, message
+    assert target.read_bytes() == b"MZ original System32"
+    assert targets(system)["SysWOW64"].read_bytes() == b"MZ original SysWOW64"
+
+
+def test_copy_onto_a_missing_target_is_removed(system):
+    target = targets(system)["SysWOW64"]
+    target.unlink()
+    runner = core.OperationRunner("unlock", processes=system.processes())
+    runner.journal.begin("unlock")
+    assert runner.process_dll_file(str(target), "SysWOW64")
+    assert runner.copy_dll_file("64-bit", "SysWOW64")
+    assert Journal().load().steps[0].sha256 is None
+
+    success, message, log = recover(system)
+    assert success, message
+    assert not target.exists()
+    assert "Removed the SysWOW64 file copied where none existed before the unlock" in log
+
+
+def test_cancelled_unlock_whose_rollback_fails(system, monkeypatch):
+    originals = {folder: path.read_bytes() for folder, path in targets(system).items()}
+    log = []
+    runner = core.OperationRunner("unlock", processes=system.processes())
+
+    def cancel_after_first_delete(message):
+        log.append(message)
+        if message == "Successfully deleted System32 file.":
+            runner.cancel()
+
+    runner.log_callback = cancel_after_first_delete
+    with monkeypatch.context() as patch:
+        patch.setattr(core.OperationRunner, "restore_from_backup", lambda self, target_file: False)
+        success, message = runner.run()
+    assert (success, message) == (False, "Operation cancelled")
+    assert "❌ Could not roll back System32 file, please run Restore" in log
+    assert not targets(system)["System32"].exists()
+    # Left in the journal for the next start
+    assert Journal().load().operation == "unlock"
+
+    success, message, _ = recover(system)
+    assert success, message
+    assert {folder: path.read_bytes() for folder, path in targets(system).items()} == originals
+    assert Journal().load() is None
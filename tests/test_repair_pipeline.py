@@ -0,0 +1,93 @@
+"""Escalation of the restore pipeline against fake sfc and DISM"""
+import core
+from benchmark import write_dism_session
+from repair_pipeline import default_steps
+
+STEPS = {step.name for step in default_steps()}
+
+
+def restore(system, processes=None):
+    log = []
+    runner = core.OperationRunner("restore", log.append, processes=processes or system.processes())
+    success, message = runner.run()
+    steps = [span.name for span in runner.tracer.spans if span.name in STEPS]
+    return success, message, steps, log
+
+
+def remove_targets(system):
+    targets = [system.system_root / folder / core.DLL_NAME for folder in ("System32", "SysWOW64")]
+    for target in targets:
+        target.unlink()
+    return targets
+
+
+def test_backup_is_enough(system):
+    unlocker = core.OperationRunner("unlock", processes=system.processes())
+    assert unlocker.run()[0]
+
+    success, message, steps, _ = restore(system)
+    assert success, message
+    assert steps == ["restore_backup"]
+
+
+def test_scanfile_restores_files_without_backup(system):
+    targets = remove_targets(system)
+
+    success, message, steps, _ = restore(system)
+    assert success, message
+    assert steps == ["restore_backup", "scanfile"]
+    assert message == "Original files restored by system file checker"
+    assert all(target.exists() for target in targets)
+
+
+def test_dism_repairs_the_store_for_scanfile(system):
+    targets = remove_targets(system)
+    system.damage_component_store()
+
+    success, message, steps, log = restore(system)
+    assert success, message
+    assert steps == ["restore_backup", "scanfile", "restore_health"]
+    assert message == "Original files restored after repairing the component store"
+    assert "The restore operation completed successfully." in log
+    assert all(target.exists() for target in targets)
+
+
+def test_full_scan_after_dism_fails(system):
+    remove_targets(system)
+    system.damage_component_store()
+    failing = system.root / "dism_source_missing.bin"
+    write_dism_session(failing, restored=False)
+
+    success, message, steps, log = restore(system, system.processes(dism_session=failing))
+    assert success, message
+    assert steps == ["restore_backup", "scanfile", "restore_health", "scannow"]
+    assert message == "Original files restored by a full system scan"
+    assert any(line.startswith("DISM could not repair the component store (code 1, dism_source_missing)")
+               for line in log)
+
+
+def test_missing_dism_is_skipped(system):
+    remove_targets(system)
+    system.damage_component_store()
+    processes = system.processes()
+    del processes.tools["dism"]
+
+    success, message, steps, log = restore(system, processes)
+    assert success, message
+    assert steps == ["restore_backup", "scanfile", "scannow"]
+    assert "dism not available on this system -- skipping restore_health" in log
+
+
+def test_missing_sfc_skips_every_sfc_step(system):
+    remove_targets(system)
+    processes = system.processes()
+    del processes.tools["sfc"]
+
+    success, message, steps, log = restore(system, processes)
+    assert not success
+    assert message == "Could not restore the original files in System32, SysWOW64"
+    assert steps == ["restore_backup"]
+    assert "sfc not available on this system -- skipping scanfile" in log
+    assert "sfc not available on this system -- skipping restore_health" in log
+    assert "sfc not available on this system -- skipping scannow" in log
+
@@ -0,0 +1,35 @@
+"""Restore against a temporary SystemRoot with fake takeown, icacls and sfc"""
+import core
+
+
+def run(system, operation, log=None):
+    runner = core.OperationRunner(operation, log.append if log is not None else None, processes=system.processes())
+    return runner.run()
+
+
+def targets(system):
+    return {folder: system.system_root / folder / core.DLL_NAME for folder in ("System32", "SysWOW64")}
+
+
+def test_restore_puts_back_the_originals(system):
+    originals = {folder: path.read_bytes() for folder, path in targets(system).items()}
+    assert run(system, "unlock")[0]
+    assert all(path.read_bytes() != originals[folder] for folder, path in targets(system).items())
+
+    success, message = run(system, "restore")
+    assert success, message
+    assert {folder: path.read_bytes() for folder, path in targets(system).items()} == originals
+
+
+def test_restore_keeps_a_file_updated_after_unlock(system):
+    assert run(system, "unlock")[0]
+    updated = targets(system)["System32"]
+    # A Windows update installs a newer original over the unlocked DLL
+    updated.write_bytes(b"MZ original System32, newer build")
+
+    log = []
+    success, message = run(system, "restore", log)
+    assert success, message
+    assert updated.read_bytes() == b"MZ original System32, newer build"
+    assert any("not replacing it with an older backup" in line for line in log)
+    assert targets(system)["SysWOW64"].read_bytes() == b"MZ original SysWOW64"
@@ -0,0 +1,100 @@
+"""SfcOutputParser against a recorded sfc /scannow session"""
+import pytest
+
+from sfc_output import (DISM_RESTORED, MESSAGE, NO_VIOLATIONS, PHASE, PROGRESS, REPAIRED, UNREPAIRABLE, VERDICT,
+                        DismOutputParser, ProgressThrottle, SfcOutputParser)
+
+
+def replay(data: bytes, chunk_size: int, parser=None):
+    parser = parser or SfcOutputParser()
+    events = []
+    for start in range(0, len(data), chunk_size):
+        events.extend(parser.feed(data[start:start + chunk_size]))
+    events.extend(parser.close())
+    return parser, events
+
+
+@pytest.fixture
+def recording(fixtures_dir) -> bytes:
+    return (fixtures_dir / "sfc_scannow_repaired.bin").read_bytes()
+
+
+def test_recording_is_utf16le_with_redraws(recording):
+    assert recording[1::2].count(0) == len(recording) // 2
+    assert "\rVerification 50% complete.\r".encode("utf-16-le") in recording
+
+
+def test_phases_progress_and_verdict(recording):
+    parser, events = replay(recording, 4096)
+
+    assert [e.text for e in events if e.kind == PHASE] == [
+        "Beginning system scan.  This process will take some time.",
+        "Beginning verification phase of system scan.",
+    ]
+    # Redraws of the same percentage are collapsed
+    assert [e.percent for e in events if e.kind == PROGRESS] == list(range(0, 101))
+    verdicts = [e for e in events if e.kind == VERDICT]
+    assert [e.verdict for e in verdicts] == [REPAIRED]
+    assert verdicts[0].text == "Windows Resource Protection found corrupt files and successfully repaired them."
+    assert parser.verdict == REPAIRED
+    assert events[-1].kind == MESSAGE
+    assert not any("\x00" in e.text or "\r" in e.text for e in events)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 4095])
+def test_odd_chunk_boundaries(recording, chunk_size):
+    # Odd sizes split UTF-16 code units, and 1 byte delays encoding detection
+    _, expected = replay(recording, len(recording))
+    _, events = replay(recording, chunk_size)
+    assert events == expected
+
+
+def test_unrepairable_verdict():
+    output = ("Beginning verification phase of system scan.\r\n\rVerification 100% complete.\r\n\r\n"
+              "Windows Resource Protection found corrupt files but was unable to fix some of them.\r\n")
+    parser, events = replay(output.encode("utf-16-le"), 5)
+    assert parser.verdict == UNREPAIRABLE
+    assert [e.kind for e in events] == [PHASE, PROGRESS, VERDICT]
+
+
+def test_throttle_passes_first_and_final_percent():
+    now = [0.0]
+    throttle = ProgressThrottle(interval=0.25, clock=lambda: now[0])
+    assert throttle.ready(1)
+    assert not throttle.ready(2)
+    now[0] = 0.3
+    assert throttle.ready(3)
+    assert throttle.ready(100)
+
+
+@pytest.mark.parametrize("lead", [b"\r\n", b""])
+@pytest.mark.parametrize("first_read", [1, 2, 3])
+def test_single_byte_output_with_a_short_first_read(lead, first_read):
+    # DISM writes single-byte text, and the first pipe read can be just a line break or a few letters
+    data = lead + (b"Beginning verification phase of system scan.\r\n\rVerification 42% complete.\r\n"
+                   b"Windows Resource Protection did not find any integrity violations.\r\n")
+    parser = SfcOutputParser()
+    events = parser.feed(data[:first_read]) + parser.feed(data[first_read:]) + parser.close()
+    assert parser.verdict == NO_VIOLATIONS
+    assert [e.kind for e in events] == [PHASE, PROGRESS, VERDICT]
+
+
+def test_short_utf16_output_is_decoded_on_close():
+    parser = SfcOutputParser()
+    events = parser.feed("Repair complete.\r\n".encode("utf-16-le")) + parser.close()
+    assert [e.text for e in events] == ["Repair complete."]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_single_byte_dism_session(fixtures_dir, chunk_size):
+    recording = (fixtures_dir / "dism_restorehealth.bin").read_bytes()
+    assert 0 not in recording
+
+    parser, events = replay(recording, chunk_size, DismOutputParser())
+    assert [e.text for e in events if e.kind == PHASE] == [
+        "Deployment Image Servicing and Management tool",
+        "Image Version: 10.0.19045.4046",
+    ]
+    percents = [e.percent for e in events if e.kind == PROGRESS]
+    assert percents[0] == 0 and percents[-1] == 100
+    assert parser.verdict == DISM_RESTORED
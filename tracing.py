@@ -0,0 +1,118 @@
+"""Lightweight timing spans for operations, exportable as Chrome trace-event JSON"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app_logging import set_log_step
+from paths import log_directory
+
+MAX_TRACE_FILES = 20
+
+
+class Span:
+    """A timed step with free-form attributes such as exit_code or bytes"""
+
+    def __init__(self, name: str, attrs: Dict):
+        self.name = name
+        self.attrs = dict(attrs)
+        self.start = time.perf_counter()
+        self.end = None
+        self.thread_id = threading.get_ident()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+
+class Tracer:
+    """Collects the spans of a single operation run"""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self.stack: List[Span] = []
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Time the enclosed block; the span name also becomes the current log step"""
+        span = Span(name, attrs)
+        self.spans.append(span)
+        self.stack.append(span)
+        set_log_step(name)
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=str(e))
+            raise
+        finally:
+            span.end = time.perf_counter()
+            self.stack.pop()
+            set_log_step(self.stack[-1].name if self.stack else None)
+
+    def summary(self) -> List[Tuple[str, int, float, Dict]]:
+        """Per-step totals as (name, count, seconds, merged attributes), in first-seen order"""
+        rows = {}
+        for span in self.spans:
+            count, seconds, attrs = rows.get(span.name, (0, 0.0, {}))
+            merged = dict(attrs)
+            for key, value in span.attrs.items():
+                if key == "bytes":
+                    merged[key] = merged.get(key, 0) + value
+                else:
+                    merged[key] = value
+            rows[span.name] = (count + 1, seconds + span.duration, merged)
+        return [(name, count, seconds, attrs) for name, (count, seconds, attrs) in rows.items()]
+
+    def format_summary(self) -> List[str]:
+        """Summary rendered as fixed-width text rows for the activity log"""
+        lines = [f"{'Step':<16}{'Count':>6}{'Time':>11}  Details"]
+        for name, count, seconds, attrs in self.summary():
+            details = ", ".join(f"{key}={value}" for key, value in attrs.items())
+            lines.append(f"{name:<16}{count:>6}{seconds * 1000:>9.1f}ms  {details}")
+        return lines
+
+    def to_chrome_trace(self) -> Dict:
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            events.append({
+                "name": span.name,
+                "cat": self.operation,
+                "ph": "X",
+                "ts": (span.start - self.origin) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": dict(span.attrs),
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"operation": self.operation, "started_at": self.started_at},
+        }
+
+    def export(self, directory: Optional[Path] = None) -> Path:
+        """Write the run as trace-<time>-<operation>.json, keeping only the newest MAX_TRACE_FILES"""
+        directory = Path(directory) if directory else log_directory() / "traces"
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        path = directory / f"trace-{stamp}-{self.operation}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+        old_traces = sorted(directory.glob("trace-*.json"))[:-MAX_TRACE_FILES]
+        for old_trace in old_traces:
+            try:
+                old_trace.unlink()
+            except OSError:
+                pass
+        return path